@@ -0,0 +1,10 @@
+"""Process-wide helpers shared by the Graphity Streamlit pages.
+
+Streamlit re-executes a page script on every widget change, but imported
+modules stay loaded for the lifetime of the server process. State that has
+to survive reruns (caches, compiled kernels, worker pools) lives here.
+"""
+
+from graphity.cache import STYLE_PARAMS, LRUCache, figure_cache, geometry_cache, geometry_key
+
+__all__ = ["STYLE_PARAMS", "LRUCache", "figure_cache", "geometry_cache", "geometry_key"]
@@ -0,0 +1,146 @@
+"""Curvature-adaptive tessellation of parametric surfaces.
+
+The (u, v) domain starts as a coarse grid of cells. Each cell is compared
+against the surface at its centre and edge midpoints; where the bilinear
+patch through its corners deviates too far (the chord error, which grows
+with curvature), the cell is split into four. Refinement stops once every
+cell is within tolerance, the depth limit is reached or the vertex budget is
+spent, and the leaves are triangulated without cracks along edges shared
+with finer neighbours.
+"""
+
+import numpy as np
+
+# Corner and sample offsets within a cell, in units of half the cell size:
+# four corners, then centre and bottom/top/left/right edge midpoints.
+_CORNERS = np.array([(0, 0), (2, 0), (0, 2), (2, 2)])
+_SAMPLES = np.array([(1, 1), (1, 0), (1, 2), (0, 1), (2, 1)])
+
+
+class _Samples:
+    """Surface positions indexed by integer lattice point, evaluated in batches."""
+
+    def __init__(self, surface, origin, step, dtype):
+        self.surface = surface
+        self.origin = origin
+        self.step = step
+        self.dtype = dtype
+        self.index = {}
+        self.points = np.empty((0, 3), dtype=dtype)
+
+    def lookup(self, lattice):
+        """Indices of the ``(..., 2)`` lattice points, evaluating new ones."""
+        keys = [tuple(point) for point in lattice.reshape(-1, 2).tolist()]
+        missing = [key for key in dict.fromkeys(keys) if key not in self.index]
+        if missing:
+            ij = np.array(missing, dtype=np.float64)
+            u = (self.origin[0] + ij[:, 0] * self.step[0]).astype(self.dtype)
+            v = (self.origin[1] + ij[:, 1] * self.step[1]).astype(self.dtype)
+            xyz = np.stack(np.broadcast_arrays(*self.surface(u, v)), axis=-1)
+            start = len(self.index)
+            self.index.update((key, start + n) for n, key in enumerate(missing))
+            self.points = np.concatenate([self.points, xyz.astype(self.dtype)])
+        return np.array([self.index[key] for key in keys]).reshape(lattice.shape[:-1])
+
+
+def _edge(start, end, vertices):
+    """Lattice points from ``start`` up to (excluding) ``end``, with hanging nodes."""
+    length = abs(end[0] - start[0]) + abs(end[1] - start[1])
+    middle = ((start[0] + end[0]) // 2, (start[1] + end[1]) // 2)
+    if length > 1 and middle in vertices:
+        return _edge(start, middle, vertices) + _edge(middle, end, vertices)
+    return [start]
+
+
+def adaptive_mesh(surface, u_range, v_range, tolerance=0.002, max_vertices=10000,
+                  initial_cells=(16, 8), max_depth=6, dtype=np.float64):
+    """Tessellate ``surface(u, v) -> (x, y, z)`` adaptively.
+
+    ``tolerance`` is the allowed chord error relative to the bounding-box
+    diagonal of the coarse mesh. Returns ``(x, y, z, triangles)`` with 1D
+    vertex coordinates and an ``(M, 3)`` int32 index buffer, ready for
+    ``go.Mesh3d``.
+    """
+    # Cells are never split below size 2 so every cell has lattice midpoints
+    scale = 2 ** (max_depth + 1)
+    nu, nv = initial_cells
+    step = ((u_range[1] - u_range[0]) / (nu * scale), (v_range[1] - v_range[0]) / (nv * scale))
+    samples = _Samples(surface, (u_range[0], v_range[0]), step, dtype)
+
+    i0, j0 = np.meshgrid(np.arange(nu) * scale, np.arange(nv) * scale)
+    cells = np.column_stack([i0.ravel(), j0.ravel(), np.full(i0.size, scale)])
+    vertices = set()
+    threshold = None
+    leaves = []
+
+    while len(cells):
+        half = cells[:, 2:3, None] // 2
+        origin = cells[:, None, :2]
+        corners = samples.lookup(origin + _CORNERS[None] * half)
+        centre_and_edges = samples.lookup(origin + _SAMPLES[None] * half)
+        vertices.update(map(tuple, (origin + _CORNERS[None] * half).reshape(-1, 2).tolist()))
+
+        points = samples.points
+        if threshold is None:
+            finite = points[np.isfinite(points).all(axis=1)]
+            extent = np.linalg.norm(finite.max(axis=0) - finite.min(axis=0)) if len(finite) else 0.0
+            threshold = tolerance * max(extent, np.finfo(np.float32).eps)
+
+        c00, c10, c01, c11 = (points[corners[:, n]] for n in range(4))
+        bilinear = np.stack([
+            (c00 + c10 + c01 + c11) / 4,
+            (c00 + c10) / 2, (c01 + c11) / 2,
+            (c00 + c01) / 2, (c10 + c11) / 2,
+        ], axis=1)
+        error = np.linalg.norm(points[centre_and_edges] - bilinear, axis=-1).max(axis=1)
+
+        candidates = np.flatnonzero((error > threshold) & (cells[:, 2] > 2))
+        candidates = candidates[np.argsort(-error[candidates], kind='stable')]
+        split = np.zeros(len(cells), dtype=bool)
+        for n in candidates:
+            new = [tuple(point) for point in (cells[n, :2] + _SAMPLES * (cells[n, 2] // 2)).tolist()]
+            new = [point for point in new if point not in vertices]
+            if len(vertices) + len(new) > max_vertices:
+                break
+            vertices.update(new)
+            split[n] = True
+
+        leaves.append(cells[~split])
+        parents = cells[split]
+        size = parents[:, 2] // 2
+        cells = np.concatenate([
+            np.column_stack([parents[:, 0] + di * size, parents[:, 1] + dj * size, size])
+            for di in (0, 1) for dj in (0, 1)
+        ]) if len(parents) else np.empty((0, 3), dtype=cells.dtype)
+
+    # Triangulate each leaf. Cells with hanging nodes on their edges are
+    # fanned from their centre so they share those nodes with their neighbours.
+    triangles = []
+    for i, j, size in np.concatenate(leaves).tolist():
+        ring = (_edge((i, j), (i + size, j), vertices)
+                + _edge((i + size, j), (i + size, j + size), vertices)
+                + _edge((i + size, j + size), (i, j + size), vertices)
+                + _edge((i, j + size), (i, j), vertices))
+        if len(ring) == 4:
+            triangles.append((ring[0], ring[1], ring[2]))
+            triangles.append((ring[0], ring[2], ring[3]))
+        else:
+            centre = (i + size // 2, j + size // 2)
+            triangles.extend((centre, ring[n], ring[(n + 1) % len(ring)]) for n in range(len(ring)))
+
+    lattice = np.array(triangles, dtype=np.int64).reshape(-1, 2)
+    used, triangles = np.unique(samples.lookup(lattice), return_inverse=True)
+    x, y, z = samples.points[used].T
+    return x, y, z, triangles.reshape(-1, 3).astype(np.int32)
+
+
+def mesh_edge_lines(x, y, z, triangles):
+    """Coordinates of every unique triangle edge, NaN-separated for one line trace."""
+    edges = np.sort(triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1)
+    edges = np.unique(edges, axis=0)
+    lines = []
+    for coordinate in (x, y, z):
+        segments = np.full((len(edges), 3), np.nan, dtype=coordinate.dtype)
+        segments[:, :2] = coordinate[edges]
+        lines.append(segments.ravel())
+    return lines
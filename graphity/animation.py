@@ -0,0 +1,112 @@
+"""Client-side Plotly animations.
+
+Frames built here only carry what changes between them, so plotly.js plays
+them in the browser without another request to the server and without the
+trace arrays being sent again. Animated surfaces are evaluated for every
+frame at once, as one ``(3, T, V, U)`` array.
+"""
+
+import math
+import os
+
+import numpy as np
+
+from graphity.encoding import typed_array
+
+# Target playback rate for camera animations
+FRAME_RATE = 30
+# A full turn never uses more frames than this (24 s at FRAME_RATE); slower
+# speeds get a turn of this length rather than longer frames
+MAX_ORBIT_FRAMES = 720
+
+# Surface animations: playback rate, and limits on the frame count and on
+# the float32 coordinates of all frames together
+SURFACE_FRAME_RATE = 12
+MAX_FRAMES = 60
+DEFAULT_ANIMATION_BUDGET_MB = 32
+animation_budget_mb = float(os.environ.get('GRAPHITY_ANIMATION_BUDGET_MB', DEFAULT_ANIMATION_BUDGET_MB))
+
+
+def orbit_frames(eye, speed):
+    """Camera-only frames turning ``eye`` one full revolution about the z axis.
+
+    ``speed`` is in radians per frame at ``FRAME_RATE``; it is rounded down
+    so a whole number of frames closes the turn, and raised to
+    ``2 * pi / MAX_ORBIT_FRAMES`` if it is slower than that. Frames always
+    last ``1000 / FRAME_RATE`` ms so the rotation plays at the display frame
+    rate. Returns the frames and that duration in milliseconds.
+    """
+    count = min(math.ceil(2 * math.pi / speed), MAX_ORBIT_FRAMES)
+    step = 2 * math.pi / count
+    duration = 1000 / FRAME_RATE
+    radius = math.hypot(eye['x'], eye['y'])
+    start = math.atan2(eye['y'], eye['x'])
+    frames = []
+    for k in range(1, count + 1):
+        angle = start + step * k
+        # Four decimals are far below what a camera move can show
+        camera = {'eye': {'x': round(radius * math.cos(angle), 4), 'y': round(radius * math.sin(angle), 4),
+                          'z': eye['z']}}
+        frames.append({'name': str(k), 'layout': {'scene': {'camera': camera}}})
+    return frames, duration
+
+
+def play_buttons(duration):
+    """Play/Pause ``updatemenus`` entry for frames of ``duration`` milliseconds."""
+    play = {'frame': {'duration': duration, 'redraw': True},
+            'transition': {'duration': 0}, 'fromcurrent': True, 'mode': 'immediate'}
+    pause = {'frame': {'duration': 0, 'redraw': False},
+             'transition': {'duration': 0}, 'mode': 'immediate'}
+    return {
+        'type': 'buttons', 'showactive': False, 'direction': 'left',
+        'x': 0.05, 'y': 0.05, 'xanchor': 'left', 'yanchor': 'bottom',
+        'buttons': [{'label': 'Play', 'method': 'animate', 'args': [None, play]},
+                    {'label': 'Pause', 'method': 'animate', 'args': [[None], pause]}],
+    }
+
+
+def frame_budget(frames, samples, budget_mb=None):
+    """How many of ``frames`` frames of ``samples`` points fit the budget."""
+    budget_mb = animation_budget_mb if budget_mb is None else budget_mb
+    frame_bytes = 3 * samples * np.dtype(np.float32).itemsize
+    return min(frames, MAX_FRAMES, int(budget_mb * 1024 ** 2 // frame_bytes))
+
+
+def evaluate_frames(kernel, u, v, t, out=None, dtype=np.float64):
+    """Evaluate ``kernel(u, v, t, out)`` for every ``t`` in one vectorized call.
+
+    The axes are passed as broadcastable views, t along the first axis, so
+    terms that do not depend on t are computed once for all frames. Returns
+    the ``(3, T, V, U)`` output.
+    """
+    if out is None:
+        out = np.empty((3, len(t), len(v), len(u)), dtype=dtype)
+    kernel(u[None, None, :], v[None, :, None], t[:, None, None], out)
+    return out
+
+
+def data_frames(trace_type, arrays, trace=0):
+    """Frames setting the arrays of trace ``trace``, one frame per leading index.
+
+    ``arrays`` maps attributes of the ``trace_type`` trace (``'x'``, ``'y'``,
+    ``'z'``) to stacks with the frame along the first axis. Attributes that
+    are the same in every frame are left out, so they are sent once, with
+    the figure.
+    """
+    count = len(next(iter(arrays.values())))
+    changing = {name: stack for name, stack in arrays.items()
+                if not all(np.array_equal(frame, stack[0], equal_nan=True) for frame in stack[1:])}
+    return [{'name': str(k), 'traces': [trace],
+             'data': [dict({name: typed_array(stack[k]) for name, stack in changing.items()}, type=trace_type)]}
+            for k in range(count)]
+
+
+def frame_slider(labels, prefix=''):
+    """Slider jumping to the frames named ``'0'``, ``'1'``, ... labelled ``labels``."""
+    jump = {'frame': {'duration': 0, 'redraw': True}, 'transition': {'duration': 0}, 'mode': 'immediate'}
+    return {
+        'active': 0, 'x': 0.2, 'len': 0.75, 'y': 0.05, 'yanchor': 'bottom',
+        'currentvalue': {'prefix': prefix},
+        'steps': [{'label': label, 'method': 'animate', 'args': [[str(k)], jump]}
+                  for k, label in enumerate(labels)],
+    }
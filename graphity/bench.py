@@ -0,0 +1,517 @@
+"""Micro-benchmarks for the surface evaluation pipeline.
+
+Run with ``python -m graphity.bench <name>``; ``python -m graphity.bench``
+lists the available benchmarks.
+"""
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# Default custom parametric surface from the explorer page
+TORUS_EXPRS = ("(1 + 0.5*cos(v))*cos(u)", "(1 + 0.5*cos(v))*sin(u)", "0.5*sin(v)")
+# Non-separable expressions where every term costs a full-grid evaluation
+HEAVY_EXPRS = ("sin(u*v)*cos(u + v)", "exp(-u*v/10)*sin(u - v)", "sqrt(u**2 + v**2)*tanh(u*v)")
+# The explorer's built-in surfaces with default parameters: expressions, u range, v range
+BUILTIN_SURFACES = {
+    'Mobius strip': (("(1 + 0.5*v*cos(u/2))*cos(u)", "(1 + 0.5*v*cos(u/2))*sin(u)", "0.5*v*sin(u/2)"),
+                     (0, 2 * np.pi), (-1, 1)),
+    'Klein bottle': (("6*cos(u)*(1 + sin(u)) + 4*(1 - cos(u)/2)*cos(v + pi)", "16*sin(u)",
+                      "6*cos(u)*(1 + sin(u)) + 4*(1 - cos(u)/2)*sin(v)"),
+                     (0, 2 * np.pi), (0, 2 * np.pi)),
+    'Torus': (("(2 + 0.5*cos(v))*cos(u)", "(2 + 0.5*cos(v))*sin(u)", "0.5*sin(v)"),
+              (0, 2 * np.pi), (0, 2 * np.pi)),
+    'Sphere': (("sin(v)*cos(u)", "sin(v)*sin(u)", "cos(v)"), (0, 2 * np.pi), (0, np.pi)),
+}
+
+
+def measure(func, repeat=5):
+    """Best wall time over ``repeat`` runs and the peak traced allocation."""
+    func()  # warm caches and compiled kernels
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def bench_fused(u_res=1000, v_res=1000, exprs=TORUS_EXPRS):
+    """Separately compiled x/y/z kernels versus one fused kernel for all three."""
+    import sympy as sp
+
+    from graphity.expressions import compile_surface
+    from graphity.symbolic import parse_expressions
+
+    _, parsed = parse_expressions(exprs, ('u', 'v'))
+    replacements, outputs = sp.cse(parsed, symbols=sp.numbered_symbols('_cse'))
+    separate_ops = sum(sp.count_ops(expr) for expr in parsed)
+    fused_ops = sum(sp.count_ops(expr) for _, expr in replacements) + sum(sp.count_ops(expr) for expr in outputs)
+
+    u, v = np.meshgrid(np.linspace(0, 2 * np.pi, u_res), np.linspace(0, 2 * np.pi, v_res))
+    funcs = [compile_surface((text,), ('u', 'v')) for text in exprs]
+    kernel = compile_surface(exprs, ('u', 'v'))
+
+    def separate():
+        return [func(u, v, np.empty((1,) + u.shape)) for func in funcs]
+
+    def fused():
+        return kernel(u, v, np.empty((3,) + u.shape))
+
+    print(f"grid {u_res}x{v_res}, expressions {exprs}")
+    # Every operation allocates a new array unless it writes into the output
+    separate_temporaries = separate_ops - sum(func.source.count("out=") for func in funcs)
+    fused_temporaries = fused_ops - kernel.source.count("out=")
+    print(f"{'path':<10}{'ufunc calls':>12}{'temporaries':>12}{'time ms':>10}{'peak MB':>10}")
+    for name, ops, temporaries, func in (('separate', separate_ops, separate_temporaries, separate),
+                                         ('fused', fused_ops, fused_temporaries, fused)):
+        seconds, peak = measure(func)
+        print(f"{name:<10}{ops:>12}{temporaries:>12}{seconds * 1e3:>10.1f}{peak / 1024 ** 2:>10.1f}")
+
+
+def bench_separable(u_res=1000, v_res=1000, exprs=TORUS_EXPRS):
+    """Fused kernel on dense meshgrids versus broadcastable 1D parameter views."""
+    from graphity.evaluation import parameter_grid
+    from graphity.expressions import compile_surface
+
+    kernel = compile_surface(exprs, ('u', 'v'))
+    u = np.linspace(0, 2 * np.pi, u_res)
+    v = np.linspace(0, 2 * np.pi, v_res)
+
+    print(f"grid {u_res}x{v_res}, expressions {exprs}")
+    print(f"{'grid':<10}{'time ms':>10}{'peak MB':>10}")
+    for name, separable in (('dense', False), ('separable', True)):
+        uu, vv = parameter_grid(u, v, separable=separable)
+        seconds, peak = measure(lambda: kernel(uu, vv, np.empty((3, v_res, u_res))))
+        print(f"{name:<10}{seconds * 1e3:>10.1f}{peak / 1024 ** 2:>10.1f}")
+
+
+class _DtypeProbe(np.ndarray):
+    """Array recording the dtype of every ufunc result computed from it."""
+
+    results = []
+
+    def __array_ufunc__(self, ufunc, method, *inputs, out=None, **kwargs):
+        inputs = [np.asarray(item) if isinstance(item, _DtypeProbe) else item for item in inputs]
+        if out is not None:
+            kwargs['out'] = tuple(np.asarray(item) for item in out)
+        result = getattr(ufunc, method)(*inputs, **kwargs)
+        _DtypeProbe.results.append(np.result_type(result))
+        return result.view(_DtypeProbe) if isinstance(result, np.ndarray) else result
+
+
+def intermediate_dtypes(kernel, *arrays, out):
+    """Dtypes of all ufunc results, temporaries included, of ``kernel(*arrays, out)``."""
+    _DtypeProbe.results = []
+    kernel(*(array.view(_DtypeProbe) for array in arrays), out)
+    return set(_DtypeProbe.results)
+
+
+def bench_precision(sizes=((100, 50), (500, 500), (2000, 2000)), exprs=TORUS_EXPRS):
+    """float64 versus float32 evaluation, memory and Plotly payload size."""
+    import plotly.graph_objects as go
+
+    from graphity.evaluation import parameter_grid
+    from graphity.expressions import compile_surface
+
+    kernel = compile_surface(exprs, ('u', 'v'))
+    go.Figure(go.Surface(z=np.zeros((2, 2)))).to_json()  # import the JSON machinery up front
+    print(f"{'grid':<12}{'dtype':<9}{'eval ms':>9}{'peak MB':>9}{'payload MB':>12}{'to_json ms':>12}")
+    for u_res, v_res in sizes:
+        for dtype in (np.float64, np.float32):
+            u, v = parameter_grid(np.linspace(0, 2 * np.pi, u_res, dtype=dtype),
+                                  np.linspace(0, 2 * np.pi, v_res, dtype=dtype))
+            evaluate = lambda: kernel(u, v, np.empty((3, v_res, u_res), dtype=dtype))
+            seconds, peak = measure(evaluate, repeat=3)
+            x, y, z = evaluate()
+            start = time.perf_counter()
+            payload = go.Figure(go.Surface(x=x, y=y, z=z)).to_json()
+            serialize = time.perf_counter() - start
+            print(f"{f'{u_res}x{v_res}':<12}{np.dtype(dtype).name:<9}{seconds * 1e3:>9.1f}"
+                  f"{peak / 1024 ** 2:>9.1f}{len(payload) / 1024 ** 2:>12.2f}{serialize * 1e3:>12.1f}")
+
+    # float32 inputs must stay float32 through every temporary, whichever
+    # compiler produced the kernel
+    axis = np.linspace(-5, 5, 64, dtype=np.float32)
+    for backend in ('numpy', 'sympy'):
+        for texts, variables in ((exprs, ('u', 'v')), (HEAVY_EXPRS, ('u', 'v')),
+                                 (("sin(sqrt(x**2 + y**2))",), ('x', 'y'))):
+            if backend == 'numpy':
+                kernel = compile_surface(texts, variables)
+            else:
+                from graphity.symbolic import symbolic_kernel
+                kernel = symbolic_kernel(texts, variables, 'numpy')
+            out = np.empty((len(texts), 64, 64), dtype=np.float32)
+            dtypes = intermediate_dtypes(kernel, axis[None, :], axis[:, None], out=out)
+            if dtypes != {np.dtype(np.float32)}:
+                raise AssertionError(f"{backend} kernel for {texts} computes in {sorted(map(str, dtypes))}")
+    print("float32 kernels keep every temporary in float32")
+
+
+def _tiled_case(budget_bytes, path, size, expr):
+    # Runs in a fresh process so ru_maxrss reflects this case only
+    from graphity.expressions import compile_explicit
+    from graphity.tiling import export_npy, evaluate_tiled, peak_rss_bytes
+
+    kernel = compile_explicit(expr)
+    axis = np.linspace(-5, 5, size)
+    baseline = peak_rss_bytes()
+    start = time.perf_counter()
+    if path is None:
+        evaluate_tiled(kernel, axis, axis, budget_bytes=budget_bytes)
+    else:
+        export_npy(path, kernel, axis, axis, budget_bytes=budget_bytes)
+    return time.perf_counter() - start, baseline, peak_rss_bytes()
+
+
+def bench_tiled(size=4000, expr="sin(sqrt(x**2 + y**2))"):
+    """Peak RSS of untiled, tiled and memory-mapped explicit surface evaluation."""
+    import multiprocessing
+    import os
+    import tempfile
+
+    cases = [('untiled', 2 ** 62, None), ('tiled 64 MB', 64 * 1024 ** 2, None)]
+    directory = tempfile.mkdtemp()
+    cases.append(('tiled to .npy', 64 * 1024 ** 2, os.path.join(directory, 'surface.npy')))
+
+    print(f"explicit z = {expr} on {size}x{size} (output {3 * size * size * 8 / 1024 ** 2:.0f} MB)")
+    print(f"{'mode':<16}{'time s':>8}{'import MB':>11}{'peak RSS MB':>13}")
+    context = multiprocessing.get_context('spawn')
+    for name, budget, path in cases:
+        with context.Pool(1) as pool:
+            seconds, baseline, peak = pool.apply(_tiled_case, (budget, path, size, expr))
+        print(f"{name:<16}{seconds:>8.2f}{baseline / 1024 ** 2:>11.0f}{peak / 1024 ** 2:>13.0f}")
+        if path is not None:
+            os.remove(path)
+    os.rmdir(directory)
+
+
+def bench_parallel(size=2000, worker_counts=(1, 2, 4, 8, 16), exprs=HEAVY_EXPRS):
+    """Process-pool scaling of custom parametric evaluation."""
+    import os
+
+    from graphity.expressions import compile_surface
+    from graphity.parallel import evaluate_parallel
+    from graphity.tiling import evaluate_tiled
+
+    u = np.linspace(0, 2 * np.pi, size)
+    v = np.linspace(0, 2 * np.pi, size)
+    kernel = compile_surface(exprs, ('u', 'v'))
+    in_process, _ = measure(lambda: evaluate_tiled(kernel, u, v), repeat=3)
+
+    print(f"grid {size}x{size}, {os.cpu_count()} CPUs, in-process {in_process * 1e3:.1f} ms")
+    print(f"{'workers':<9}{'time ms':>9}{'speedup':>9}")
+    for workers in worker_counts:
+        seconds, _ = measure(lambda: evaluate_parallel(exprs, ('u', 'v'), u, v, workers=workers), repeat=3)
+        print(f"{workers:<9}{seconds * 1e3:>9.1f}{in_process / seconds:>9.2f}")
+
+
+def bench_threads(size=2000, thread_counts=(1, 2, 4, 8), exprs=HEAVY_EXPRS):
+    """Thread-pool evaluation of per-component kernels and row chunks."""
+    import os
+
+    from graphity.expressions import compile_surface
+    from graphity.threaded import evaluate_threaded
+    from graphity.tiling import evaluate_tiled
+
+    u = np.linspace(0, 2 * np.pi, size)
+    v = np.linspace(0, 2 * np.pi, size)
+    fused = compile_surface(exprs, ('u', 'v'))
+    kernels = [(compile_surface((expr,), ('u', 'v')), n, 1) for n, expr in enumerate(exprs)]
+    serial, _ = measure(lambda: evaluate_tiled(fused, u, v), repeat=3)
+
+    print(f"grid {size}x{size}, {os.cpu_count()} CPUs, single-threaded {serial * 1e3:.1f} ms")
+    print(f"{'threads':<9}{'time ms':>9}{'speedup':>9}")
+    for threads in thread_counts:
+        seconds, _ = measure(lambda: evaluate_threaded(kernels, u, v, threads=threads), repeat=3)
+        print(f"{threads:<9}{seconds * 1e3:>9.1f}{serial / seconds:>9.2f}")
+
+
+def bench_isolation(sizes=((100, 50), (500, 500), (2000, 2000)), exprs=TORUS_EXPRS):
+    """Round-trip cost of evaluating in an isolated worker versus in-process."""
+    from graphity.expressions import compile_surface
+    from graphity.isolation import IsolatedPool
+    from graphity.tiling import evaluate_tiled
+
+    pool = IsolatedPool(workers=1)
+    kernel = compile_surface(exprs, ('u', 'v'))
+    print(f"{'grid':<12}{'in-process ms':>15}{'isolated ms':>13}{'overhead ms':>13}")
+    for u_res, v_res in sizes:
+        u = np.linspace(0, 2 * np.pi, u_res)
+        v = np.linspace(0, 2 * np.pi, v_res)
+        local, _ = measure(lambda: evaluate_tiled(kernel, u, v), repeat=3)
+        isolated, _ = measure(lambda: pool.evaluate(exprs, ('u', 'v'), u, v), repeat=3)
+        print(f"{u_res}x{v_res:<8}{local * 1e3:>15.1f}{isolated * 1e3:>13.1f}{(isolated - local) * 1e3:>13.1f}")
+
+
+def bench_jit(sizes=((100, 50), (500, 500), (2000, 2000)), exprs=HEAVY_EXPRS):
+    """Fused NumPy kernel versus the Numba element-wise loop."""
+    from graphity.expressions import compile_surface
+    from graphity.jit import jit_available
+    from graphity.tiling import evaluate_tiled
+
+    if not jit_available():
+        print("numba is not installed")
+        return
+    numpy_kernel = compile_surface(exprs, ('u', 'v'))
+    start = time.perf_counter()
+    numba_kernel = compile_surface(exprs, ('u', 'v'), 'numba')
+    numba_kernel(np.zeros(1), np.zeros(1), np.empty((3, 1)))
+    print(f"numba compile {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    print(f"{'grid':<12}{'numpy ms':>10}{'numba ms':>10}{'numpy peak MB':>15}{'numba peak MB':>15}")
+    for u_res, v_res in sizes:
+        u = np.linspace(0, 2 * np.pi, u_res)
+        v = np.linspace(0, 2 * np.pi, v_res)
+        out = np.empty((3, v_res, u_res))
+        # Untiled so the peak shows every temporary the kernel allocates
+        uu, vv = u[None, :], v[:, None]
+        numpy_time, numpy_peak = measure(lambda: numpy_kernel(uu, vv, out), repeat=3)
+        numba_time, numba_peak = measure(lambda: numba_kernel(uu, vv, out), repeat=3)
+        print(f"{u_res}x{v_res:<8}{numpy_time * 1e3:>10.1f}{numba_time * 1e3:>10.1f}"
+              f"{numpy_peak / 1024 ** 2:>15.1f}{numba_peak / 1024 ** 2:>15.1f}")
+
+
+def bench_native(size=1000, cases=(TORUS_EXPRS, HEAVY_EXPRS, ("sin(sqrt(x**2 + y**2))",))):
+    """Compile and evaluation time of the native compiler versus sympy."""
+    import importlib
+
+    from graphity.native import native_kernel
+
+    start = time.perf_counter()
+    symbolic = importlib.import_module('graphity.symbolic')  # imports sympy
+    print(f"sympy import {(time.perf_counter() - start) * 1e3:.0f} ms")
+
+    u = np.linspace(0, 2 * np.pi, size)[None, :]
+    v = np.linspace(0, 2 * np.pi, size)[:, None]
+    print(f"{'expressions':<28}{'compile ms':>22}{'evaluate ms':>22}")
+    print(f"{'':<28}{'native':>11}{'sympy':>11}{'native':>11}{'sympy':>11}")
+    for texts in cases:
+        variables = ('x', 'y') if 'x' in texts[0] else ('u', 'v')
+        out = np.empty((len(texts), size, size))
+        row = []
+        for compile_kernel in (native_kernel, symbolic.symbolic_kernel):
+            start = time.perf_counter()
+            kernel = compile_kernel(tuple(texts), variables)
+            row.append((time.perf_counter() - start, kernel))
+        timings = [measure(lambda: kernel(u, v, out), repeat=3)[0] for _, kernel in row]
+        label = texts[0] if len(texts[0]) <= 26 else texts[0][:23] + "..."
+        print(f"{label:<28}{row[0][0] * 1e3:>11.1f}{row[1][0] * 1e3:>11.1f}"
+              f"{timings[0] * 1e3:>11.1f}{timings[1] * 1e3:>11.1f}")
+
+
+def bench_wireframe(sizes=((100, 50), (500, 250), (1000, 500))):
+    """One Scatter3d per grid line versus a single NaN-separated trace."""
+    import plotly.graph_objects as go
+
+    from graphity.wireframe import grid_lines
+
+    def per_line(x, y, z):
+        traces = [go.Scatter3d(x=x[i], y=y[i], z=z[i], mode='lines') for i in range(x.shape[0])]
+        traces += [go.Scatter3d(x=x[:, j], y=y[:, j], z=z[:, j], mode='lines') for j in range(x.shape[1])]
+        return go.Figure(traces).to_json()
+
+    def single(x, y, z, limit):
+        line_x, line_y, line_z = grid_lines(x, y, z, limit)
+        return go.Figure([go.Scatter3d(x=line_x, y=line_y, z=line_z, mode='lines')]).to_json()
+
+    print("figure build + JSON serialization")
+    print(f"{'grid':<12}{'path':<18}{'traces':>8}{'time ms':>10}{'JSON KB':>10}")
+    for u_res, v_res in sizes:
+        u, v = np.meshgrid(np.linspace(0, 2 * np.pi, u_res), np.linspace(0, np.pi, v_res))
+        x, y, z = np.cos(u) * np.sin(v), np.sin(u) * np.sin(v), np.cos(v)
+        for name, traces, func in (('per line', u_res + v_res, lambda: per_line(x, y, z)),
+                                   ('single', 1, lambda: single(x, y, z, 0)),
+                                   ('single, decimated', 1, lambda: single(x, y, z, None))):
+            seconds, _ = measure(func, repeat=3)
+            print(f"{f'{u_res}x{v_res}':<12}{name:<18}{traces:>8}{seconds * 1e3:>10.1f}{len(func()) / 1024:>10.0f}")
+
+
+def bench_mesh(sizes=((100, 50), (500, 250), (1000, 500))):
+    """Surface trace versus a welded, indexed Mesh3d of a torus."""
+    import plotly.graph_objects as go
+
+    from graphity.mesh import weld_grid
+
+    print("figure build + JSON serialization (weld time included for mesh)")
+    print(f"{'grid':<12}{'trace':<10}{'vertices':>10}{'time ms':>10}{'JSON KB':>10}")
+    for u_res, v_res in sizes:
+        u, v = np.meshgrid(np.linspace(0, 2 * np.pi, u_res), np.linspace(0, 2 * np.pi, v_res))
+        x, y, z = (2 + np.cos(v)) * np.cos(u), (2 + np.cos(v)) * np.sin(u), np.sin(v)
+
+        def surface():
+            return go.Figure([go.Surface(x=x, y=y, z=z)]).to_json()
+
+        def mesh():
+            mx, my, mz, triangles = weld_grid(x, y, z)
+            i, j, k = triangles.T
+            return go.Figure([go.Mesh3d(x=mx, y=my, z=mz, i=i, j=j, k=k)]).to_json()
+
+        welded = len(weld_grid(x, y, z)[0])
+        for name, vertices, func in (('surface', x.size, surface), ('mesh3d', welded, mesh)):
+            seconds, _ = measure(func, repeat=3)
+            print(f"{f'{u_res}x{v_res}':<12}{name:<10}{vertices:>10}{seconds * 1e3:>10.1f}{len(func()) / 1024:>10.0f}")
+
+
+def bench_encoding(size=500):
+    """Surface figure JSON with decimal lists, plotly's own array encoding and typed arrays."""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    from graphity.encoding import typed_array
+    from graphity.expressions import compile_surface
+    from graphity.tiling import evaluate_tiled
+
+    encodings = (('decimal lists', lambda a: a.tolist()),
+                 ('plotly numpy', lambda a: a),
+                 ('typed float32', typed_array))
+    print(f"{size}x{size} go.Surface, figure build + plotly.io.to_json as st.plotly_chart calls it")
+    print(f"{'surface':<14}{'encoding':<16}{'time ms':>10}{'JSON KB':>10}")
+    for name, (exprs, u_range, v_range) in BUILTIN_SURFACES.items():
+        u, v = np.linspace(*u_range, size), np.linspace(*v_range, size)
+        x, y, z = evaluate_tiled(compile_surface(exprs, ('u', 'v')), u, v)
+        for label, encode in encodings:
+            def serialize():
+                figure = go.Figure([go.Surface(x=encode(x), y=encode(y), z=encode(z))])
+                return pio.to_json(figure, validate=False)
+            seconds, _ = measure(serialize, repeat=3)
+            print(f"{name:<14}{label:<16}{seconds * 1e3:>10.1f}{len(serialize()) / 1024:>10.0f}")
+
+
+def bench_animation(size=200, frames=24, exprs=("(2 + 0.5*cos(v))*cos(u)*(1 + 0.2*sin(t))",
+                                                  "(2 + 0.5*cos(v))*sin(u)*(1 + 0.2*sin(t))",
+                                                  "0.5*sin(v + t)")):
+    """Animation frames evaluated one at a time versus as one (3, T, V, U) array."""
+    from graphity.animation import evaluate_frames
+    from graphity.expressions import compile_surface
+    from graphity.tiling import evaluate_tiled
+
+    u, v = np.linspace(0, 2 * np.pi, size), np.linspace(0, 2 * np.pi, size)
+    t = np.linspace(0, 2 * np.pi, frames)
+    per_frame = [compile_surface(tuple(text.replace('t', f'({float(value)!r})') for text in exprs), ('u', 'v'))
+                 for value in t]
+    stacked = compile_surface(exprs, ('u', 'v', 't'))
+
+    print(f"{frames} frames of {size}x{size}")
+    print(f"{'path':<12}{'time ms':>10}{'peak MB':>10}")
+    for name, func in (('per frame', lambda: [evaluate_tiled(kernel, u, v) for kernel in per_frame]),
+                       ('stacked', lambda: evaluate_frames(stacked, u, v, t))):
+        seconds, peak = measure(func, repeat=3)
+        print(f"{name:<12}{seconds * 1e3:>10.1f}{peak / 1024 ** 2:>10.1f}")
+
+
+def bench_lod(u_res=1000, v_res=500, targets=(50_000, 20_000)):
+    """Full-resolution Surface figures versus meshes decimated for display."""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    from graphity.encoding import typed_array
+    from graphity.expressions import compile_surface
+    from graphity.lod import simplify_mesh
+    from graphity.tiling import evaluate_tiled
+
+    cases = {'Klein bottle': BUILTIN_SURFACES['Klein bottle'],
+             'custom z=f(x,y)': (("u", "v", "sin(sqrt(u**2 + v**2))"), (-5, 5), (-5, 5))}
+    print(f"{u_res}x{v_res} grid; figure build + plotly.io.to_json as st.plotly_chart calls it")
+    print(f"{'surface':<17}{'display':<10}{'triangles':>10}{'simplify ms':>13}{'figure ms':>11}{'JSON KB':>10}")
+    for name, (exprs, u_range, v_range) in cases.items():
+        u, v = np.linspace(*u_range, u_res), np.linspace(*v_range, v_res)
+        x, y, z = evaluate_tiled(compile_surface(exprs, ('u', 'v')), u, v)
+
+        def full():
+            figure = go.Figure([go.Surface(x=typed_array(x), y=typed_array(y), z=typed_array(z))])
+            return pio.to_json(figure, validate=False)
+
+        seconds, _ = measure(full, repeat=3)
+        print(f"{name:<17}{'full':<10}{2 * (u_res - 1) * (v_res - 1):>10}{'':>13}"
+              f"{seconds * 1e3:>11.1f}{len(full()) / 1024:>10.0f}")
+        for target in targets:
+            simplify_seconds, _ = measure(lambda: simplify_mesh(x, y, z, None, target), repeat=3)
+            mx, my, mz, triangles = simplify_mesh(x, y, z, None, target)
+
+            def decimated():
+                i, j, k = (typed_array(triangles[:, n]) for n in range(3))
+                figure = go.Figure([go.Mesh3d(x=typed_array(mx), y=typed_array(my), z=typed_array(mz),
+                                              i=i, j=j, k=k, intensity=typed_array(mz))])
+                return pio.to_json(figure, validate=False)
+
+            seconds, _ = measure(decimated, repeat=3)
+            print(f"{name:<17}{target:<10}{len(triangles):>10}{simplify_seconds * 1e3:>13.1f}"
+                  f"{seconds * 1e3:>11.1f}{len(decimated()) / 1024:>10.0f}")
+
+
+def bench_colormaps(size=1000, name='viridis'):
+    """Coloring a scalar field: matplotlib cmap(norm(z)) versus the shared lookup table."""
+    import matplotlib
+    import matplotlib.pyplot as plt
+
+    from graphity.colormaps import map_scalars
+
+    u, v = np.meshgrid(np.linspace(-5, 5, size), np.linspace(-5, 5, size))
+    z = np.sin(np.sqrt(u ** 2 + v ** 2))
+    colormap = matplotlib.colormaps[name]
+    cases = (('cmap(norm(z))', lambda: colormap(plt.Normalize(z.min(), z.max())(z))),
+             ('table uint8', lambda: map_scalars(z, name)),
+             ('table float32', lambda: map_scalars(z, name, dtype=np.float32)))
+    print(f"{size}x{size} RGBA colors of z under {name}")
+    print(f"{'path':<16}{'time ms':>10}{'peak MB':>10}{'result MB':>11}")
+    for label, func in cases:
+        seconds, peak = measure(func)
+        print(f"{label:<16}{seconds * 1e3:>10.1f}{peak / 1024 ** 2:>10.1f}{func().nbytes / 1024 ** 2:>11.1f}")
+
+
+def bench_surface(sizes=((500, 500), (2000, 2000))):
+    """Bounds and NaN count: separate passes over x, y, z versus SurfaceMesh's single pass."""
+    from graphity.surface import SurfaceMesh
+
+    def separate(points):
+        x, y, z = points
+        ranges = [(c.max() + c.min()) / 2 for c in (x, y, z)] + [c.max() - c.min() for c in (x, y, z)]
+        return ranges, np.count_nonzero(np.isnan(points))
+
+    print(f"{'grid':<12}{'path':<12}{'time ms':>10}")
+    for u_res, v_res in sizes:
+        u, v = np.meshgrid(np.linspace(0, 2 * np.pi, u_res), np.linspace(0, 2 * np.pi, v_res))
+        points = np.stack([(2 + np.cos(v)) * np.cos(u), (2 + np.cos(v)) * np.sin(u), np.sin(v)])
+        for name, func in (('separate', lambda: separate(points)), ('one pass', lambda: SurfaceMesh(points, ''))):
+            seconds, _ = measure(func)
+            print(f"{f'{u_res}x{v_res}':<12}{name:<12}{seconds * 1e3:>10.2f}")
+
+
+BENCHMARKS = {
+    'fused': bench_fused,
+    'separable': bench_separable,
+    'precision': bench_precision,
+    'tiled': bench_tiled,
+    'parallel': bench_parallel,
+    'threads': bench_threads,
+    'isolation': bench_isolation,
+    'jit': bench_jit,
+    'native': bench_native,
+    'wireframe': bench_wireframe,
+    'mesh': bench_mesh,
+    'encoding': bench_encoding,
+    'animation': bench_animation,
+    'lod': bench_lod,
+    'colormaps': bench_colormaps,
+    'surface': bench_surface,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in BENCHMARKS:
+        print("usage: python -m graphity.bench {" + ",".join(BENCHMARKS) + "}")
+        return 2
+    BENCHMARKS[argv[0]]()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Latency-budget control of the grid resolution.
+
+Evaluating and drawing a surface takes a fixed overhead plus time roughly
+proportional to the number of grid samples, at a rate that depends on the
+surface (its type and expressions) and on how it is drawn. ``CostModel``
+keeps a running fit of both terms for each, and ``choose_resolution`` picks
+the largest grid whose predicted time fits a latency budget.
+"""
+
+import math
+import os
+import threading
+
+DEFAULT_LATENCY_BUDGET_MS = 500
+latency_budget_ms = float(os.environ.get('GRAPHITY_LATENCY_BUDGET_MS', DEFAULT_LATENCY_BUDGET_MS))
+
+MIN_RESOLUTION = 10
+MAX_RESOLUTION = 1000
+# Resolutions are multiples of this so small timing noise does not change the grid
+RESOLUTION_STEP = 10
+# The current grid is kept while its predicted time is within this share of the budget
+HYSTERESIS = 0.75
+
+# Parameters that change the cost per sample of evaluating a surface
+COST_PARAMS = ('graph_type', 'precision', 'x_expr', 'y_expr', 'z_expr')
+
+
+def cost_key(params):
+    """Key under which the evaluation cost of ``params``'s surface is tracked."""
+    return tuple(params.get(name) for name in COST_PARAMS)
+
+
+class CostModel:
+    """Exponentially weighted ``fixed + per_sample * samples`` fits, one per key.
+
+    Until a key has been timed at clearly different grid sizes the two terms
+    cannot be told apart, and its fixed overhead is taken as
+    ``default_fixed``, capped at half the measured time.
+    """
+
+    def __init__(self, default_rate, default_fixed=0.0, smoothing=0.5):
+        self.default_rate = default_rate
+        self.default_fixed = default_fixed
+        self.smoothing = smoothing
+        # Decayed sums of 1, samples, seconds, samples² and samples × seconds
+        self._sums = {}
+        self._observations = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key, samples, seconds):
+        """Record that ``samples`` samples under ``key`` took ``seconds``."""
+        terms = (1.0, samples, seconds, samples * samples, samples * seconds)
+        with self._lock:
+            sums = self._sums.get(key, (0.0,) * 5)
+            self._sums[key] = tuple((1 - self.smoothing) * total + term for total, term in zip(sums, terms))
+            self._observations[key] = self._observations.get(key, 0) + 1
+
+    def observations(self, key):
+        """Number of timings recorded under ``key``."""
+        with self._lock:
+            return self._observations.get(key, 0)
+
+    def _fit(self, sums):
+        weight, samples, seconds, squares, products = sums
+        mean_samples, mean_seconds = samples / weight, seconds / weight
+        variance = squares / weight - mean_samples ** 2
+        # Sizes spread by over 10% of their mean separate the two terms
+        if variance > (0.1 * mean_samples) ** 2:
+            rate = (products / weight - mean_samples * mean_seconds) / variance
+            fixed = mean_seconds - rate * mean_samples
+            if rate > 0 and fixed >= 0:
+                return fixed, rate
+        fixed = min(self.default_fixed, mean_seconds / 2)
+        return fixed, (mean_seconds - fixed) / max(mean_samples, 1)
+
+    def estimate(self, key):
+        """Estimated ``(fixed_seconds, seconds_per_sample)``; unseen keys get the mean of the others."""
+        with self._lock:
+            sums = self._sums.get(key)
+            fits = [self._fit(sums)] if sums is not None else [self._fit(other) for other in self._sums.values()]
+        if not fits:
+            return self.default_fixed, self.default_rate
+        return sum(fixed for fixed, _ in fits) / len(fits), sum(rate for _, rate in fits) / len(fits)
+
+    def predict(self, key, samples):
+        """Predicted seconds for ``samples`` samples under ``key``."""
+        fixed, rate = self.estimate(key)
+        return fixed + rate * samples
+
+
+# Evaluation is keyed by ``cost_key``, drawing (figure build and
+# serialization) by rendering style
+evaluation_costs = CostModel(default_rate=2e-7, default_fixed=0.01)
+render_costs = CostModel(default_rate=5e-6, default_fixed=0.05)
+
+
+def choose_resolution(fixed_seconds, seconds_per_sample, budget_seconds, current):
+    """Largest ``(u_res, v_res)`` predicted to fit ``budget_seconds``.
+
+    A grid of ``n`` samples is predicted to take
+    ``fixed_seconds + seconds_per_sample * n``.
+    The ``u_res:v_res`` ratio of ``current`` is kept, and ``current`` itself
+    is returned while its predicted time is between ``HYSTERESIS`` and 100%
+    of the budget, so the grid only changes when it is clearly too large or
+    too small.
+    """
+    u_res, v_res = current
+    predicted = fixed_seconds + seconds_per_sample * u_res * v_res
+    if HYSTERESIS * budget_seconds <= predicted <= budget_seconds:
+        return current
+    aspect = u_res / v_res
+    samples = max(budget_seconds - fixed_seconds, 0) / max(seconds_per_sample, 1e-12)
+    u_res = int(math.sqrt(samples * aspect)) // RESOLUTION_STEP * RESOLUTION_STEP
+    u_res = min(max(u_res, MIN_RESOLUTION), MAX_RESOLUTION)
+    v_res = max(2, round(u_res / aspect))
+    return u_res, v_res
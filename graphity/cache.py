@@ -0,0 +1,153 @@
+"""LRU caches for evaluated surface geometry."""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from graphity.surface import SurfaceMesh
+
+
+# Parameters that only change how a surface is drawn, never its coordinates.
+# Anything not listed here is treated as geometry, so a new parameter that is
+# forgotten here costs a cache miss rather than a stale surface.
+STYLE_PARAMS = frozenset({
+    'colormap', 'plot_style', 'alpha', 'show_grid', 'show_axes', 'show_colorbar',
+})
+
+DEFAULT_GEOMETRY_CACHE_MB = 256
+DEFAULT_FIGURE_CACHE_MB = 128
+
+
+def geometry_key(params):
+    """Return a canonical hash of the geometry-relevant part of ``params``."""
+    geometry = {}
+    for name, value in params.items():
+        if name in STYLE_PARAMS:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        elif isinstance(value, (np.floating, np.integer)):
+            value = value.item()
+        geometry[name] = value
+    canonical = json.dumps(geometry, sort_keys=True, default=repr)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def array_nbytes(value):
+    """Total size of the numpy arrays contained in a (possibly nested) value."""
+    if isinstance(value, (np.ndarray, SurfaceMesh)):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(array_nbytes(item) for item in value)
+    return 0
+
+
+def payload_nbytes(value):
+    """Approximate size of a figure payload: its arrays and (base64) strings."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(payload_nbytes(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(payload_nbytes(item) for item in value)
+    return array_nbytes(value)
+
+
+def _freeze(value):
+    # Cached arrays are shared between reruns and sessions; make sure nobody
+    # can modify them in place.
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _freeze(item)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache bounded by size and/or entry count.
+
+    ``sizeof`` measures an entry in bytes and is only consulted when
+    ``max_bytes`` is set. Entries larger than the whole budget are not stored.
+    """
+
+    def __init__(self, max_bytes=None, max_entries=None, sizeof=array_nbytes):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+        _freeze(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self.current_bytes += size
+            self._evict()
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+            or (self.max_entries is not None and len(self._entries) > self.max_entries)
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            self.evictions += 1
+
+
+# One cache per server process, shared by every session.
+geometry_cache = LRUCache(
+    max_bytes=int(float(os.environ.get('GRAPHITY_GEOMETRY_CACHE_MB', DEFAULT_GEOMETRY_CACHE_MB)) * 1024 ** 2)
+)
+
+# Figures built from cached geometry, keyed by geometry key and rendering
+# style, so style-only changes skip encoding the trace arrays
+figure_cache = LRUCache(
+    max_bytes=int(float(os.environ.get('GRAPHITY_FIGURE_CACHE_MB', DEFAULT_FIGURE_CACHE_MB)) * 1024 ** 2),
+    sizeof=payload_nbytes
+)
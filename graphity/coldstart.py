@@ -0,0 +1,108 @@
+"""Cold-start budget check for the Graphity pages.
+
+Run with ``python -m graphity.coldstart [page]`` (default: the explorer).
+Two costs are measured, each in fresh interpreters so nothing is already
+imported or cached:
+
+- import: executing the page's top-level imports;
+- first render: the page's first full run under Streamlit's ``AppTest``,
+  through to the chart of its default built-in surface. Streamlit itself is
+  loaded beforehand, as it is in a running server.
+
+The median over the runs is compared with the budgets, and the exit status
+is nonzero when either is exceeded or the page fails to render, so the
+check can gate a CI job.
+"""
+
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# About twice what the explorer takes on a single-core machine, so noise
+# passes but an eager heavy import or worker start does not
+DEFAULT_IMPORT_BUDGET_MS = 1000
+DEFAULT_FIRST_RENDER_BUDGET_MS = 1000
+import_budget_ms = float(os.environ.get('GRAPHITY_IMPORT_BUDGET_MS', DEFAULT_IMPORT_BUDGET_MS))
+first_render_budget_ms = float(os.environ.get('GRAPHITY_FIRST_RENDER_BUDGET_MS', DEFAULT_FIRST_RENDER_BUDGET_MS))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PAGE = os.path.join(ROOT, 'pages', 'explorer.py')
+# Fresh interpreters per measurement; the median damps scheduling noise
+RUNS = 3
+
+_IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+exec(compile(sys.argv[1], sys.argv[2], 'exec'), {})
+print(time.perf_counter() - start)
+"""
+
+_RENDER_SCRIPT = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+start = time.perf_counter()
+app.run()
+seconds = time.perf_counter() - start
+failures = [e.value for e in app.exception] + [e.value for e in app.error]
+print(json.dumps({'seconds': seconds, 'charts': len(app.get('plotly_chart')), 'failures': failures}))
+"""
+
+
+def page_imports(path):
+    """Source of the top-level import statements of the script at ``path``."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(imports, type_ignores=[]))
+
+
+def _run(script, *args):
+    # Run from the repository root, as ``streamlit run`` does, so ``graphity`` resolves
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    result = subprocess.run([sys.executable, '-c', script, *args], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_imports(path, runs=RUNS):
+    """Median seconds to execute the page's imports in a fresh interpreter."""
+    source = page_imports(path)
+    return statistics.median(float(_run(_IMPORT_SCRIPT, source, path)) for _ in range(runs))
+
+
+def measure_first_render(path, runs=RUNS):
+    """Median seconds of the page's first run, and the failures of the last one.
+
+    A run that draws no chart counts as a failure.
+    """
+    times = []
+    for _ in range(runs):
+        report = json.loads(_run(_RENDER_SCRIPT, path))
+        times.append(report['seconds'])
+        failures = report['failures'] or ([] if report['charts'] else ["no chart was drawn"])
+    return statistics.median(times), failures
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path = os.path.abspath(argv[0]) if argv else DEFAULT_PAGE
+    import_seconds = measure_imports(path)
+    render_seconds, failures = measure_first_render(path)
+    over = False
+    print(f"{'stage':<14}{'median ms':>11}{'budget ms':>11}")
+    for stage, seconds, budget_ms in (('import', import_seconds, import_budget_ms),
+                                      ('first render', render_seconds, first_render_budget_ms)):
+        exceeded = seconds * 1e3 > budget_ms
+        over |= exceeded
+        print(f"{stage:<14}{seconds * 1e3:>11.0f}{budget_ms:>11.0f}" + ("  OVER BUDGET" if exceeded else ""))
+    for failure in failures:
+        print(f"render failed: {failure}")
+    return 1 if over or failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
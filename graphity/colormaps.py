@@ -0,0 +1,124 @@
+"""Colormaps shared by the Plotly and matplotlib pages.
+
+Every map is sampled once per process into a 256-entry uint8 RGBA lookup
+table. Plotly colorscales are built from the table, and scalar fields are
+colored by indexing it, so both renderers draw exactly the same colors and
+no page rebuilds colormap objects on a rerun. Each RGBA entry is also kept
+packed into one uint32, so coloring a field gathers one word per point.
+"""
+
+import threading
+
+import numpy as np
+
+LUT_SIZE = 256
+
+# matplotlib colormaps offered by name
+STANDARD_MAPS = ['viridis', 'plasma', 'inferno', 'magma', 'cividis',
+                 'Spectral', 'coolwarm', 'rainbow', 'jet']
+
+# Graphity themes: evenly spaced color stops, interpolated linearly
+CUSTOM_MAPS = {
+    'ocean': ['#03045e', '#0077b6', '#00b4d8', '#90e0ef', '#caf0f8'],
+    'sunset': ['#4a0a77', '#b5179e', '#f72585', '#fb8500', '#ffcf55'],
+    'forest': ['#081c15', '#1b4332', '#2d6a4f', '#52b788', '#d8f3dc'],
+    'galaxy': ['#0d1b2a', '#1b263b', '#415a77', '#778da9', '#e0e1dd'],
+    'fire': ['#370617', '#9d0208', '#dc2f02', '#f48c06', '#ffba08'],
+}
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def _custom_table(colors):
+    stops = np.array([[int(color[k:k + 2], 16) for k in (1, 3, 5)] for color in colors], dtype=np.float64)
+    positions = np.linspace(0, 1, len(colors))
+    samples = np.linspace(0, 1, LUT_SIZE)
+    table = np.full((LUT_SIZE, 4), 255, dtype=np.uint8)
+    for channel in range(3):
+        table[:, channel] = np.round(np.interp(samples, positions, stops[:, channel]))
+    return table
+
+
+def _colorscale(table):
+    positions = np.linspace(0, 1, LUT_SIZE)
+    return [[round(float(position), 4), f'rgb({r},{g},{b})']
+            for position, (r, g, b, _) in zip(positions, table.tolist())]
+
+
+def _build_registry():
+    import matplotlib
+
+    tables = {}
+    for name in STANDARD_MAPS:
+        colormap = matplotlib.colormaps[name].resampled(LUT_SIZE)
+        tables[name] = colormap(np.arange(LUT_SIZE), bytes=True)
+    for name, colors in CUSTOM_MAPS.items():
+        tables[name] = _custom_table(colors)
+    registry = {}
+    for name, table in tables.items():
+        entry = (table, table.view(np.uint32).ravel(), (table / 255).astype(np.float32))
+        for array in entry:
+            array.setflags(write=False)
+        registry[name] = entry + (_colorscale(table),)
+    return registry
+
+
+def _registered(name):
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = _build_registry()
+    return _registry[name]
+
+
+def colormap_names():
+    """Names of all registered colormaps, standard ones first."""
+    return STANDARD_MAPS + list(CUSTOM_MAPS)
+
+
+def lookup_table(name):
+    """The read-only ``(LUT_SIZE, 4)`` uint8 RGBA table of colormap ``name``."""
+    return _registered(name)[0]
+
+
+def color_indices(values, low=None, high=None):
+    """Table indices of ``values`` scaled from ``[low, high]`` (default: their range).
+
+    Binned like a matplotlib colormap under ``Normalize(low, high)``; values
+    outside the range get the end colors, NaN the first one.
+    """
+    values = np.asarray(values)
+    low = np.nanmin(values) if low is None else low
+    high = np.nanmax(values) if high is None else high
+    scale = LUT_SIZE / (high - low) if high > low else 0.0
+    index = np.subtract(values, low, dtype=np.float32)
+    index *= scale
+    np.clip(index, 0, LUT_SIZE - 1, out=index)
+    np.nan_to_num(index, copy=False)
+    return index.astype(np.intp)
+
+
+def map_scalars(values, name, low=None, high=None, dtype=np.uint8):
+    """RGBA colors of ``values`` under colormap ``name``, shape ``values.shape + (4,)``.
+
+    ``dtype`` is ``np.uint8`` for 0-255 bytes or ``np.float32`` for 0-1
+    floats, as matplotlib's ``facecolors`` expects.
+    """
+    _, packed, floats, _ = _registered(name)
+    index = color_indices(values, low, high)
+    if np.dtype(dtype) == np.float32:
+        return np.take(floats, index, axis=0)
+    return packed.take(index).view(np.uint8).reshape(index.shape + (4,))
+
+
+def plotly_colorscale(name):
+    """Plotly colorscale with one stop per table entry; shared, so never modify it."""
+    return _registered(name)[3]
+
+
+def matplotlib_colormap(name):
+    """A ``ListedColormap`` of the table, for colorbars and other matplotlib artists."""
+    from matplotlib.colors import ListedColormap
+
+    return ListedColormap(lookup_table(name) / 255, name=name)
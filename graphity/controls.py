@@ -0,0 +1,52 @@
+"""Sidebar controls generated from the surface registry.
+
+The one Streamlit-facing piece of the surface engine: the pages draw the
+inputs of the selected ``graphity.surfaces.Surface`` with
+``surface_controls`` and pass the returned parameters back to the engine.
+"""
+
+import streamlit as st
+
+
+def _widget_key(prefix, name):
+    return f"{prefix}_{name}" if prefix else None
+
+
+def surface_controls(surface, key_prefix=None, on_change=None, form=None, on_submit=None, hint_suffix=""):
+    """Draw the inputs of ``surface`` and return its parameter dict.
+
+    Sliders of predefined surfaces call ``on_change``. Custom surfaces get a
+    heading, the variable hint (extended by ``hint_suffix``), one text input
+    per expression and their domain bounds; inside ``st.form(form)`` with an
+    "Update Graph" button calling ``on_submit`` if ``form`` is given. Widget
+    keys are ``key_prefix`` joined to the parameter keys, or none without a
+    prefix.
+    """
+    params = {}
+    if not surface.custom:
+        sliders = surface.parameters
+        columns = st.columns(len(sliders)) if len(sliders) > 1 else [st.container()] * len(sliders)
+        for column, parameter in zip(columns, sliders):
+            with column:
+                params[parameter.key] = st.slider(
+                    parameter.label, parameter.low, parameter.high, parameter.default, parameter.step,
+                    key=_widget_key(key_prefix, parameter.key), on_change=on_change)
+        return params
+
+    container = st.form(key=form) if form else st.container()
+    with container:
+        st.markdown(f"### {surface.heading}")
+        st.markdown(f"<div class='info-box'>{surface.hint}{hint_suffix}</div>", unsafe_allow_html=True)
+        for expression in surface.expressions:
+            params[expression.key] = st.text_input(expression.label, expression.default,
+                                                   key=_widget_key(key_prefix, expression.widget))
+        # Lower bounds on the left, upper bounds on the right
+        bounds = surface.parameters
+        for column, half in zip(st.columns(2), (bounds[0::2], bounds[1::2])):
+            with column:
+                for parameter in half:
+                    params[parameter.key] = st.number_input(parameter.label, value=parameter.default,
+                                                            key=_widget_key(key_prefix, parameter.key))
+        if form:
+            st.form_submit_button(label="Update Graph", on_click=on_submit)
+    return params
@@ -0,0 +1,38 @@
+"""Binary encoding of trace arrays for Plotly figures.
+
+plotly.js accepts data arrays as base64-encoded typed arrays,
+``{'dtype': 'f4', 'bdata': ..., 'shape': 'V, U'}``, which are much smaller
+and faster to produce than decimal JSON lists. plotly.py 6 emits numpy
+arrays this way in their own dtype; ``typed_array`` does it in the dtypes
+the browser draws with anyway: WebGL takes float32 coordinates and int32
+indices, so float64 and int64 only double the payload.
+
+These specs need plotly.py 6 or later (earlier versions reject them as trace
+data) and plotly.js 2.28 or later to decode them, hence the plotly and
+Streamlit minimums in requirements.txt.
+"""
+
+import base64
+
+import numpy as np
+
+# Dtype sent to the browser for each array kind, and its plotly.js code
+DISPLAY_DTYPES = {'f': np.float32, 'i': np.int32, 'u': np.uint32, 'b': np.uint8}
+_CODES = {np.dtype(np.float32): 'f4', np.dtype(np.int32): 'i4',
+          np.dtype(np.uint32): 'u4', np.dtype(np.uint8): 'u1'}
+
+
+def typed_array(array):
+    """``array`` as a plotly.js typed-array spec in its display dtype.
+
+    Floats beyond the float32 range become +/-inf, which plotly.js skips
+    like NaN.
+    """
+    array = np.asarray(array)
+    dtype = np.dtype(DISPLAY_DTYPES[array.dtype.kind])
+    with np.errstate(over='ignore'):
+        array = np.ascontiguousarray(array, dtype=dtype)
+    spec = {'dtype': _CODES[dtype], 'bdata': base64.b64encode(array.data).decode('ascii')}
+    if array.ndim > 1:
+        spec['shape'] = ', '.join(map(str, array.shape))
+    return spec
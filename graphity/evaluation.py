@@ -0,0 +1,26 @@
+"""Parameter grids for evaluating surfaces."""
+
+import os
+
+import numpy as np
+
+# Separable mode keeps u and v as broadcastable 1D views, (1, U) and (V, 1),
+# so terms that depend on one parameter are evaluated O(U + V) times and only
+# the final coordinates are materialized at full (V, U) size. Set
+# GRAPHITY_SEPARABLE=0 to fall back to dense meshgrids.
+SEPARABLE = os.environ.get('GRAPHITY_SEPARABLE', '1') != '0'
+
+
+def parameter_grid(u, v, separable=None):
+    """Return ``(u, v)`` grids with u varying along columns and v along rows."""
+    if separable is None:
+        separable = SEPARABLE
+    return np.meshgrid(u, v, sparse=separable)
+
+
+def materialize(shape, *components, dtype=np.float64):
+    """Broadcast ``components`` into one ``(len(components),) + shape`` array."""
+    out = np.empty((len(components),) + tuple(shape), dtype=dtype)
+    for target, component in zip(out, components):
+        target[...] = component
+    return out
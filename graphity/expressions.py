@@ -0,0 +1,71 @@
+"""Compilation of user-entered expressions into NumPy callables.
+
+Common expressions are compiled by ``graphity.native`` straight from the
+Python AST; anything else goes through sympy (``graphity.symbolic``), which
+is only imported when needed.
+"""
+
+import os
+
+from graphity.cache import LRUCache
+from graphity.native import native_kernel
+
+DEFAULT_KERNEL_CACHE_SIZE = 256
+
+# Compiled callables are shared by every session served by this process, so
+# each unique expression is parsed and compiled once.
+kernel_cache = LRUCache(
+    max_entries=int(os.environ.get('GRAPHITY_KERNEL_CACHE_SIZE', DEFAULT_KERNEL_CACHE_SIZE))
+)
+
+
+def normalize_expression(text):
+    """Collapse whitespace so trivially different inputs share a cache entry."""
+    return " ".join(text.split())
+
+
+def compile_surface(texts, variables, backend='numpy'):
+    """Return a cached fused kernel evaluating all of ``texts`` together.
+
+    Common subexpressions across the outputs are computed once and
+    single-variable subterms are kept at their own 1D shape. The kernel is
+    called as ``kernel(*arrays, out)`` where ``out`` is a preallocated array
+    of shape ``(len(texts),) + broadcast shape`` and is returned filled.
+
+    Expressions the native compiler supports skip sympy entirely. With
+    ``backend='numba'`` the kernel is a compiled element-wise loop when
+    Numba is installed (see ``graphity.jit``).
+    """
+    key = ('fused', tuple(normalize_expression(text) for text in texts), tuple(variables), backend)
+    kernel = kernel_cache.get(key)
+    if kernel is None:
+        kernel = native_kernel(key[1], key[2]) if backend == 'numpy' else None
+        if kernel is None:
+            from graphity.symbolic import symbolic_kernel
+
+            kernel = symbolic_kernel(key[1], key[2], backend)
+        kernel_cache.put(key, kernel)
+    return kernel
+
+
+def compile_explicit(text, variables=('x', 'y'), backend='numpy'):
+    """Return a cached kernel filling ``(x, y, z(x, y))`` for an explicit surface.
+
+    Same calling convention as ``compile_surface`` with a three-component
+    ``out``; the first two components receive the broadcast inputs. Further
+    variables, such as a time ``t``, are passed on to the z expression.
+    """
+    key = ('explicit', normalize_expression(text), tuple(variables), backend)
+    kernel = kernel_cache.get(key)
+    if kernel is None:
+        z_kernel = compile_surface((text,), variables, backend)
+
+        def kernel(x, y, *rest):
+            *rest, out = rest
+            out[0][...] = x
+            out[1][...] = y
+            z_kernel(x, y, *rest, out[2:])
+            return out
+
+        kernel_cache.put(key, kernel)
+    return kernel
@@ -0,0 +1,238 @@
+"""Isolated worker processes for parsing and evaluating user expressions.
+
+Parsing goes through sympy, which happily evaluates ``10**10**10`` or nests
+``exp`` until it runs out of memory. Running that on the Streamlit script
+thread stalls every session served by the process, so custom expressions are
+parsed and evaluated in a small pool of pre-warmed worker processes instead.
+Each job has a wall-clock timeout, each worker a cap on its address space,
+and a worker that times out, dies or has served its quota of jobs is
+replaced by a fresh one.
+"""
+
+import os
+import queue
+from contextlib import suppress
+import resource
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graphity.animation import evaluate_frames
+from graphity.expressions import compile_surface
+from graphity.jit import BACKEND, jit_available
+from graphity.parallel import _compile
+from graphity.spawn import spawn_context
+from graphity.threaded import evaluate_threaded
+from graphity.tiling import evaluate_tiled
+
+ISOLATED = os.environ.get('GRAPHITY_ISOLATE', '1') == '1'
+ISOLATED_WORKERS = int(os.environ.get('GRAPHITY_ISOLATED_WORKERS', 2))
+JOB_TIMEOUT = float(os.environ.get('GRAPHITY_JOB_TIMEOUT', 10))
+WORKER_MEMORY_MB = int(os.environ.get('GRAPHITY_WORKER_MEMORY_MB', 2048))
+WORKER_MAX_JOBS = int(os.environ.get('GRAPHITY_WORKER_MAX_JOBS', 200))
+
+# Samples per axis of the grid a check job evaluates the expressions on
+CHECK_SAMPLES = 8
+
+
+class EvaluationError(ValueError):
+    """An expression failed to parse or evaluate in a worker."""
+
+
+class EvaluationTimeout(EvaluationError, TimeoutError):
+    """A job ran past its timeout and its worker was stopped."""
+
+
+def _limit_memory(memory_bytes):
+    if memory_bytes:
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            memory_bytes = min(memory_bytes, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+
+
+def _check(texts, variables, backend):
+    axes = np.meshgrid(*(np.linspace(-1, 1, CHECK_SAMPLES),) * len(variables), sparse=True)
+    _compile(texts, variables, backend)(*axes, np.empty((3,) + (CHECK_SAMPLES,) * len(variables)))
+
+
+def _evaluate(texts, variables, backend, u, v, dtype, threaded, name):
+    shape = (3, len(v), len(u))
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        if not threaded:
+            evaluate_tiled(_compile(texts, variables, backend), u, v, out)
+        elif len(texts) == 3:
+            # One kernel per component so x, y and z run concurrently
+            kernels = [(compile_surface((text,), variables, backend), n, 1) for n, text in enumerate(texts)]
+            evaluate_threaded(kernels, u, v, out)
+        else:
+            evaluate_threaded([(_compile(texts, variables, backend), 0, 3)], u, v, out)
+        del out
+    finally:
+        block.close()
+
+
+def _evaluate_frames(texts, variables, backend, u, v, t, dtype, name):
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray((3, len(t), len(v), len(u)), dtype=dtype, buffer=block.buf)
+        evaluate_frames(_compile(texts, variables, backend), u, v, t, out)
+        del out
+    finally:
+        block.close()
+
+
+def _evaluate_points(texts, variables, backend, u, v, dtype, name):
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray((3,) + np.broadcast_shapes(u.shape, v.shape), dtype=dtype, buffer=block.buf)
+        _compile(texts, variables, backend)(u, v, out)
+        del out
+    finally:
+        block.close()
+
+
+_JOBS = {'check': _check, 'evaluate': _evaluate, 'frames': _evaluate_frames, 'points': _evaluate_points}
+
+
+def _serve(conn, memory_bytes):
+    # Worker main loop: one job at a time until the parent closes the pipe
+    _limit_memory(memory_bytes)
+    import sympy  # noqa: F401  (warm the import before the first job)
+    if BACKEND == 'numba' and jit_available():
+        import numba  # noqa: F401
+
+    while True:
+        try:
+            kind, args = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(('ok', _JOBS[kind](*args)))
+        except Exception as e:
+            conn.send(('error', str(e) or type(e).__name__))
+
+
+class _Worker:
+    """One worker process and the parent's end of its pipe."""
+
+    def __init__(self, context, memory_bytes):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, memory_bytes), daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+
+    def stop(self):
+        self.conn.close()
+        self.process.kill()
+        self.process.join()
+
+
+class IsolatedPool:
+    """A fixed number of worker processes serving jobs with a timeout each."""
+
+    def __init__(self, workers=ISOLATED_WORKERS, timeout=JOB_TIMEOUT,
+                 memory_mb=WORKER_MEMORY_MB, max_jobs=WORKER_MAX_JOBS):
+        # spawn, not fork: the Streamlit server is multi-threaded
+        self.context = spawn_context()
+        self.timeout = timeout
+        self.memory_bytes = memory_mb * 1024 ** 2
+        self.max_jobs = max_jobs
+        self.recycled = 0
+        self._idle = queue.Queue()
+        for _ in range(workers):
+            self._idle.put(_Worker(self.context, self.memory_bytes))
+
+    def run(self, kind, *args, timeout=None):
+        """Run job ``kind`` on an idle worker and return its result."""
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._idle.get()
+        healthy = False
+        try:
+            worker.conn.send((kind, args))
+            if not worker.conn.poll(timeout):
+                raise EvaluationTimeout(f"Evaluation took longer than {timeout:g} s and was stopped")
+            status, value = worker.conn.recv()
+            healthy = True
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            raise EvaluationError("Evaluation worker exited unexpectedly (out of memory?)") from None
+        finally:
+            worker.jobs += 1
+            if not healthy or worker.jobs >= self.max_jobs:
+                worker.stop()
+                worker = _Worker(self.context, self.memory_bytes)
+                self.recycled += 1
+            self._idle.put(worker)
+        if status == 'error':
+            raise EvaluationError(value)
+        return value
+
+    def check(self, texts, variables, backend='numpy', timeout=None):
+        """Parse ``texts`` and evaluate them on a tiny grid, raising on failure."""
+        self.run('check', tuple(texts), tuple(variables), backend, timeout=timeout)
+
+    def evaluate(self, texts, variables, u, v, threaded=False, backend='numpy', dtype=np.float64, timeout=None):
+        """Evaluate a custom surface over the ``u`` x ``v`` grid in a worker.
+
+        ``texts`` holds the x, y and z expressions of a parametric surface, or
+        a single z expression for an explicit one. Returns a ``(3, V, U)``
+        array.
+        """
+        return self._run_shared((3, len(v), len(u)), dtype, 'evaluate', tuple(texts), tuple(variables),
+                                backend, u, v, np.dtype(dtype), threaded, timeout=timeout)
+
+    def evaluate_frames(self, texts, variables, u, v, t, backend='numpy', dtype=np.float64, timeout=None):
+        """Evaluate a custom surface with a third variable ``t`` for every ``t`` at once.
+
+        Like ``evaluate``, with ``variables`` naming the u, v and t axes.
+        Returns a ``(3, T, V, U)`` array.
+        """
+        return self._run_shared((3, len(t), len(v), len(u)), dtype, 'frames', tuple(texts), tuple(variables),
+                                backend, u, v, t, np.dtype(dtype), timeout=timeout)
+
+    def evaluate_points(self, texts, variables, u, v, backend='numpy', dtype=np.float64, timeout=None):
+        """Evaluate a custom surface at broadcastable ``u`` and ``v`` arrays in a worker.
+
+        For adaptive and progressive sampling, which evaluate scattered
+        points and partial grids. Returns a ``(3,) + shape`` array.
+        """
+        u, v = np.asarray(u), np.asarray(v)
+        return self._run_shared((3,) + np.broadcast_shapes(u.shape, v.shape), dtype, 'points', tuple(texts),
+                                tuple(variables), backend, u, v, np.dtype(dtype), timeout=timeout)
+
+    def _run_shared(self, shape, dtype, kind, *args, timeout=None):
+        # Run a job that writes an array of ``shape`` into a shared block,
+        # whose name is passed as its last argument
+        dtype = np.dtype(dtype)
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        if nbytes > self.memory_bytes // 2:
+            grid = "x".join(str(n) for n in reversed(shape[1:]))
+            raise EvaluationError(f"A {grid} grid needs {nbytes / 1024 ** 2:.0f} MB, "
+                                  f"too much for the {self.memory_bytes // 1024 ** 2} MB worker memory limit")
+        block = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            self.run(kind, *args, block.name, timeout=timeout)
+            result = np.ndarray(shape, dtype=dtype, buffer=block.buf).copy()
+        finally:
+            block.close()
+            # A worker that fails to map the block unlinks it itself
+            with suppress(FileNotFoundError):
+                block.unlink()
+        return result
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_isolated_pool():
+    """The shared pool, started (and its workers warmed) on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = IsolatedPool()
+        return _pool
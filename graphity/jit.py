@@ -0,0 +1,80 @@
+"""Optional Numba backend: element-wise loops compiled from sympy expressions.
+
+A NumPy kernel applies one operator at a time to the whole grid, so every
+intermediate result is a full-size temporary. The loop generated here
+computes all outputs for one grid point before moving to the next, keeping
+intermediates in registers. Numba is an optional dependency; without it, or
+when an expression uses something Numba cannot compile, the NumPy kernel is
+used instead.
+"""
+
+import importlib.util
+import os
+
+import numpy as np
+
+# Default expression backend for custom surfaces: 'numpy' or 'numba'
+BACKEND = os.environ.get('GRAPHITY_BACKEND', 'numpy')
+
+
+def jit_available():
+    """Whether Numba can be imported."""
+    return importlib.util.find_spec('numba') is not None
+
+
+def loop_source(name, args, replacements, outputs):
+    """Python source for a loop writing each of ``outputs`` into ``_out[k, i, j]``.
+
+    The arguments are 2D arrays of the output's shape; ``replacements`` are
+    ``(symbol, expr)`` pairs from ``sympy.cse`` and become scalar locals.
+    """
+    from sympy.printing.numpy import NumPyPrinter
+
+    printer = NumPyPrinter()
+    lines = [
+        f"def {name}({', '.join(f'_a{n}' for n in range(len(args)))}, _out):",
+        "    for _i in range(_out.shape[1]):",
+        "        for _j in range(_out.shape[2]):",
+    ]
+    lines.extend(f"            {arg} = _a{n}[_i, _j]" for n, arg in enumerate(args))
+    lines.extend(f"            {symbol} = {printer.doprint(expr)}" for symbol, expr in replacements)
+    lines.extend(f"            _out[{k}, _i, _j] = {printer.doprint(expr)}" for k, expr in enumerate(outputs))
+    return "\n".join(lines) + "\n"
+
+
+def jit_kernel(args, replacements, outputs, fallback, filename='<graphity loop>'):
+    """Wrap a Numba-compiled loop in the ``kernel(*arrays, out)`` convention.
+
+    Numba compiles on the first call for each dtype and memory layout. If
+    that fails the kernel switches to ``fallback`` for good, and
+    ``kernel.backend`` records which one is in use.
+    """
+    import numba
+
+    source = loop_source('_loop', args, replacements, outputs)
+    namespace = {'numpy': np}
+    exec(compile(source, filename, 'exec'), namespace)
+    # error_model='numpy': division by zero gives inf/nan instead of raising
+    loop = numba.njit(namespace['_loop'], nogil=True, error_model='numpy')
+
+    def kernel(*arrays):
+        *arrays, out = arrays
+        if kernel.backend != 'numba':
+            return fallback(*arrays, out)
+        # The loop is 2D: point samples (1D outputs) run as a single row, and
+        # stacked grids such as animation frames (T, V, U) as T*V rows
+        grid = out.reshape(len(out), -1, out.shape[-1])
+        points = [np.broadcast_to(np.asarray(array, dtype=out.dtype), out.shape[1:]).reshape(grid.shape[1:])
+                  for array in arrays]
+        try:
+            loop(*points, grid)
+        except numba.core.errors.NumbaError:
+            kernel.backend = 'numpy'
+            return fallback(*arrays, out)
+        if not np.may_share_memory(grid, out):  # reshaping had to copy
+            out[...] = grid.reshape(out.shape)
+        return out
+
+    kernel.backend = 'numba'
+    kernel.source = source
+    return kernel
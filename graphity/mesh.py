@@ -0,0 +1,86 @@
+"""Indexed triangle meshes from gridded surfaces.
+
+Closed surfaces sampled on a ``linspace`` grid repeat their seam: the first
+and last columns of a torus coincide, as do all samples at a sphere's poles.
+``weld_grid`` merges coincident samples into one vertex and triangulates the
+grid over the merged vertices, which shrinks the payload and gives the mesh
+its actual topology.
+
+Seams and poles are matched by grid index, since snapping coordinates to a
+tolerance grid alone splits pairs that straddle a cell boundary; the
+snapping pass then catches any other coincident samples.
+"""
+
+import numpy as np
+
+
+def grid_triangles(rows, cols):
+    """``(M, 3)`` int32 triangles splitting each cell of a grid into two."""
+    index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    a, b = index[:-1, :-1].ravel(), index[:-1, 1:].ravel()
+    c, d = index[1:, :-1].ravel(), index[1:, 1:].ravel()
+    return np.concatenate([np.column_stack([a, b, d]), np.column_stack([a, d, c])])
+
+
+def _seam_labels(points, rows, cols, tolerance):
+    """Lowest sample index welded to each sample across the grid's seams and poles.
+
+    The first and last columns are compared both aligned and with one of
+    them reversed (as on a Mobius strip), likewise the first and last rows,
+    and the samples of each edge row and column are compared with its first
+    sample (a pole).
+    """
+    index = np.arange(rows * cols).reshape(rows, cols)
+    pairs = [(index[:, 0], index[:, -1]), (index[::-1, 0], index[:, -1]),
+             (index[0], index[-1]), (index[0, ::-1], index[-1])]
+    for edge in (index[0], index[-1], index[:, 0], index[:, -1]):
+        pairs.append((np.full(len(edge) - 1, edge[0]), edge[1:]))
+    keep, drop = (np.concatenate(side) for side in zip(*pairs))
+    close = (np.abs(points[keep] - points[drop]) <= tolerance).all(axis=1)
+    keep, drop = keep[close], drop[close]
+
+    # Propagate the lowest index along chains of welded pairs (a corner can
+    # be welded through a row seam and then a column seam)
+    labels = np.arange(rows * cols)
+    while True:
+        lowest = np.minimum(labels[keep], labels[drop])
+        if np.array_equal(lowest, labels[keep]) and np.array_equal(lowest, labels[drop]):
+            return labels
+        np.minimum.at(labels, keep, lowest)
+        np.minimum.at(labels, drop, lowest)
+
+
+def weld_grid(x, y, z, tolerance=None):
+    """Vertex and index buffers for a ``(V, U)`` grid with coincident samples merged.
+
+    Seam and pole samples closer than ``tolerance`` (by default a tiny
+    fraction of the bounding-box diagonal, scaled to the dtype's precision)
+    in every coordinate become one vertex, as do other samples that round
+    to the same point on a ``tolerance`` grid. Triangles that collapse to a line after welding, or touch a
+    non-finite sample, are dropped. Returns ``(x, y, z, triangles)`` with 1D
+    coordinates in the input dtype and an int32 index buffer.
+    """
+    points = np.column_stack([x.ravel(), y.ravel(), z.ravel()])
+    finite = np.isfinite(points).all(axis=1)
+    if not finite.any():
+        return x.ravel()[:0], y.ravel()[:0], z.ravel()[:0], np.empty((0, 3), dtype=np.int32)
+    low, high = points[finite].min(axis=0), points[finite].max(axis=0)
+    if tolerance is None:
+        precision = 1e-6 if points.dtype == np.float32 else 1e-9
+        tolerance = precision * max(float(np.linalg.norm(high - low)), 1.0)
+
+    # Seam partners take the coordinates of their representative, so the
+    # snapping below cannot separate them
+    points = points[_seam_labels(points, *x.shape, tolerance)]
+    keys = np.round((points[finite] - low) / tolerance).astype(np.int64)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    vertex = np.full(len(points), -1, dtype=np.int64)
+    vertex[finite] = inverse.ravel()
+
+    triangles = vertex[grid_triangles(*x.shape)]
+    keep = ((triangles >= 0).all(axis=1)
+            & (triangles[:, 0] != triangles[:, 1])
+            & (triangles[:, 1] != triangles[:, 2])
+            & (triangles[:, 0] != triangles[:, 2]))
+    welded = points[finite][first]
+    return welded[:, 0], welded[:, 1], welded[:, 2], triangles[keep].astype(np.int32)
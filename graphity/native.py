@@ -0,0 +1,194 @@
+"""Native compilation of common expressions, without sympy.
+
+Expressions built only from numbers, the surface variables, ``pi`` and
+``e``, arithmetic operators and a whitelist of elementary functions are
+compiled straight from the Python AST into a NumPy kernel with the calling
+convention of ``graphity.expressions.compile_surface``. Subtrees repeated
+across outputs are computed once, constant subtrees are folded at compile
+time, and since the kernel arguments are broadcastable 1D views, subtrees
+of a single variable stay 1D. Anything else, including every malformed
+input, is left to the sympy path so users see the same errors as before.
+"""
+
+import ast
+import re
+
+import numpy as np
+
+FUNCTIONS = {
+    'sin': 'numpy.sin', 'cos': 'numpy.cos', 'tan': 'numpy.tan',
+    'asin': 'numpy.arcsin', 'acos': 'numpy.arccos', 'atan': 'numpy.arctan',
+    'sinh': 'numpy.sinh', 'cosh': 'numpy.cosh', 'tanh': 'numpy.tanh',
+    'asinh': 'numpy.arcsinh', 'acosh': 'numpy.arccosh', 'atanh': 'numpy.arctanh',
+    'exp': 'numpy.exp', 'log': 'numpy.log', 'ln': 'numpy.log', 'sqrt': 'numpy.sqrt',
+    'Abs': 'numpy.abs', 'abs': 'numpy.abs',
+}
+CONSTANTS = {'pi': np.pi, 'e': np.e, 'E': np.e}
+
+# Operator, and the ufunc used when the result is written straight into the output
+_BINARY = {
+    ast.Add: ('+', 'numpy.add'), ast.Sub: ('-', 'numpy.subtract'),
+    ast.Mult: ('*', 'numpy.multiply'), ast.Div: ('/', 'numpy.true_divide'),
+    ast.Pow: ('**', 'numpy.power'), ast.Mod: ('%', 'numpy.mod'),
+}
+_UNARY = {ast.USub: '-', ast.UAdd: '+'}
+
+_TEMPORARY = re.compile(r'\b_t\d+\b')
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _parse(text, variables):
+    """AST of ``text``, checked against the whitelist."""
+    try:
+        tree = ast.parse(text, mode='eval').body
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        raise _Unsupported from None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp):
+            if type(node.op) not in _BINARY:
+                raise _Unsupported
+        elif isinstance(node, ast.UnaryOp):
+            if type(node.op) not in _UNARY:
+                raise _Unsupported
+        elif isinstance(node, ast.Call):
+            if (not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS
+                    or len(node.args) != 1 or node.keywords):
+                raise _Unsupported
+        elif isinstance(node, ast.Name):
+            if node.id not in variables and node.id not in CONSTANTS and node.id not in FUNCTIONS:
+                raise _Unsupported
+        elif isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise _Unsupported
+        elif not isinstance(node, (ast.operator, ast.unaryop, ast.Load)):
+            raise _Unsupported
+    # Function names are only valid as callees
+    callees = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    if any(isinstance(node, ast.Name) and node.id in FUNCTIONS and id(node) not in callees
+           for node in ast.walk(tree)):
+        raise _Unsupported
+    return tree
+
+
+class _Emitter:
+    """Generates the kernel body, sharing repeated subtrees and folding constants."""
+
+    def __init__(self, variables, repeated):
+        self.variables = variables
+        self.repeated = repeated
+        self.namespace = {'numpy': np}
+        # Constants as numpy scalars, for folding: overflow gives inf rather
+        # than an exception or a huge Python int
+        self.folding = {'numpy': np}
+        self.lines = []
+        self.temporaries = {}
+
+    def constant(self, value):
+        name = f"_c{sum(key.startswith('_c') for key in self.namespace)}"
+        try:
+            self.folding[name] = np.float64(value)
+        except OverflowError:  # integer literal beyond float range
+            self.folding[name] = np.float64(np.inf)
+        # The kernel sees a Python float: a weak scalar that keeps float32
+        # inputs in float32, where a numpy float64 would promote them
+        self.namespace[name] = float(self.folding[name])
+        return name
+
+    def emit(self, node):
+        """Code for ``node`` and the set of variables it depends on."""
+        if isinstance(node, ast.Constant):
+            return self.constant(node.value), frozenset()
+        if isinstance(node, ast.Name):
+            if node.id in self.variables:
+                return node.id, frozenset([node.id])
+            return self.constant(CONSTANTS[node.id]), frozenset()
+
+        key = ast.dump(node)
+        if key in self.temporaries:
+            return self.temporaries[key]
+        if isinstance(node, ast.BinOp):
+            (left, left_deps), (right, right_deps) = self.emit(node.left), self.emit(node.right)
+            code, deps = f"({left} {_BINARY[type(node.op)][0]} {right})", left_deps | right_deps
+        elif isinstance(node, ast.UnaryOp):
+            operand, deps = self.emit(node.operand)
+            code = f"({_UNARY[type(node.op)]}{operand})"
+        else:
+            argument, deps = self.emit(node.args[0])
+            code = f"{FUNCTIONS[node.func.id]}({argument})"
+
+        if not deps:
+            with np.errstate(all='ignore'):
+                return self.constant(eval(code, self.folding)), deps
+        if key in self.repeated:
+            name = f"_t{sum(target is not None for target, _ in self.lines)}"
+            self.lines.append((name, code))
+            code = name
+        self.temporaries[key] = code, deps
+        return code, deps
+
+    def store(self, node, target):
+        """Write ``node`` into ``target``, through ``out=`` when it spans the full grid."""
+        key = ast.dump(node)
+        full = key not in self.repeated and not isinstance(node, (ast.Constant, ast.Name))
+        if full and isinstance(node, ast.BinOp):
+            (left, left_deps), (right, right_deps) = self.emit(node.left), self.emit(node.right)
+            if left_deps | right_deps == frozenset(self.variables):
+                self.lines.append((None, f"{_BINARY[type(node.op)][1]}({left}, {right}, out={target})"))
+                return
+        elif full and isinstance(node, ast.Call):
+            argument, deps = self.emit(node.args[0])
+            if deps == frozenset(self.variables):
+                self.lines.append((None, f"{FUNCTIONS[node.func.id]}({argument}, out={target})"))
+                return
+        code, _ = self.emit(node)
+        self.lines.append((None, f"{target}[...] = {code}"))
+
+
+def native_kernel(texts, variables):
+    """Kernel for normalized ``texts``, or None if one uses unsupported syntax."""
+    try:
+        trees = [_parse(text, variables) for text in texts]
+    except _Unsupported:
+        return None
+
+    # Occurrences of each operation; the inside of a repeat is not counted
+    # again, so only the outermost shared subtree becomes a temporary
+    counts = {}
+
+    def count(node):
+        if isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Call)):
+            key = ast.dump(node)
+            counts[key] = counts.get(key, 0) + 1
+            if counts[key] > 1:
+                return
+        for child in ast.iter_child_nodes(node):
+            count(child)
+
+    for tree in trees:
+        count(tree)
+    emitter = _Emitter(tuple(variables), {key for key, count in counts.items() if count > 1})
+    for index, tree in enumerate(trees):
+        emitter.store(tree, f"_out[{index}]")
+
+    # Release each shared subtree right after its last use
+    last_use = {}
+    for index, (_, code) in enumerate(emitter.lines):
+        for name in _TEMPORARY.findall(code):
+            last_use[name] = index
+    lines = [f"def _kernel({', '.join(variables)}, _out):"]
+    for index, (target, code) in enumerate(emitter.lines):
+        lines.append(f"    {target} = {code}" if target else f"    {code}")
+        released = sorted(name for name, last in last_use.items() if last == index)
+        if released:
+            lines.append(f"    del {', '.join(released)}")
+    lines.append("    return _out")
+    source = "\n".join(lines) + "\n"
+
+    exec(compile(source, f"<graphity native kernel {tuple(texts)!r}>", 'exec'), emitter.namespace)
+    kernel = emitter.namespace['_kernel']
+    kernel.source = source
+    kernel.backend = 'numpy'
+    return kernel
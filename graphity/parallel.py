@@ -0,0 +1,163 @@
+"""Process-pool evaluation of custom surfaces across row tiles.
+
+Workers are started once per server process and live until it exits. A job
+ships only the expression text and the 1D parameter axes; each worker
+compiles the kernel through its own copy of ``graphity.expressions``'s
+kernel cache and writes its rows straight into a shared-memory block, so the
+evaluated arrays are never pickled.
+
+With ``graphity.isolation`` enabled, the expressions are checked in the
+isolated pool rather than compiled in the calling process, and the workers
+run under the same memory cap and job timeout as the isolated ones; a pool
+whose job times out or whose worker dies is stopped and replaced.
+"""
+
+import os
+import queue
+import signal
+import threading
+import time
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from graphity.expressions import compile_explicit, compile_surface
+from graphity.jit import BACKEND, jit_available
+from graphity.spawn import spawn_context
+from graphity.tiling import evaluate_tiled
+
+# 0 disables the pool. Below PARALLEL_MIN_SAMPLES the inter-process overhead
+# outweighs the gain and evaluation stays in-process.
+WORKERS = int(os.environ.get('GRAPHITY_WORKERS', '0'))
+PARALLEL_MIN_SAMPLES = int(os.environ.get('GRAPHITY_PARALLEL_MIN_SAMPLES', 250_000))
+
+# Tiles per worker; more tiles than workers smooths out uneven rows
+TILES_PER_WORKER = 4
+
+# workers -> (executor, queue of its worker process ids)
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _warm_worker(memory_bytes, started):
+    # graphity.isolation imports this module, so its helpers are imported late
+    from graphity.isolation import _limit_memory
+    _limit_memory(memory_bytes)
+    started.put(os.getpid())
+    # Kernels are compiled natively or by numba; sympy is only imported if an
+    # expression needs it. Pay the numba import when the worker starts.
+    if BACKEND == 'numba' and jit_available():
+        import numba  # noqa: F401
+
+
+def _ready(_):
+    return True
+
+
+def get_pool(workers):
+    """The persistent pool with ``workers`` processes, started on first use."""
+    from graphity.isolation import ISOLATED, WORKER_MEMORY_MB
+    with _pools_lock:
+        if workers not in _pools:
+            # spawn, not fork: the Streamlit server is multi-threaded
+            context = spawn_context()
+            started = context.Queue()
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_warm_worker,
+                                       initargs=(WORKER_MEMORY_MB * 1024 ** 2 if ISOLATED else 0, started))
+            # Wait for the workers to start, so start-up is not charged to a job's timeout
+            all(pool.map(_ready, range(workers)))
+            _pools[workers] = pool, started
+        return _pools[workers][0]
+
+
+def _discard_pool(workers):
+    # Stop a pool with a stuck or dead worker; the next job starts a new one
+    with _pools_lock:
+        pool, started = _pools.pop(workers, (None, None))
+    if pool is None:
+        return
+    pool.shutdown(wait=False, cancel_futures=True)
+    # Shutting down does not interrupt a running job, so the workers the pool
+    # started are killed; exited ones are harmless to signal
+    while True:
+        try:
+            pid = started.get_nowait()
+        except queue.Empty:
+            break
+        with suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGKILL)
+    started.close()
+
+
+def use_process_pool(samples, workers=None):
+    """Whether a grid of ``samples`` points should go to the process pool."""
+    workers = WORKERS if workers is None else workers
+    return workers > 1 and samples >= PARALLEL_MIN_SAMPLES
+
+
+def _compile(texts, variables, backend='numpy'):
+    if len(texts) == 1:
+        return compile_explicit(texts[0], variables, backend)
+    return compile_surface(texts, variables, backend)
+
+
+def _evaluate_rows(texts, variables, backend, u, v, first, name, shape, dtype):
+    # Runs in a worker: fill rows [first, first + len(v)) of the shared output
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        evaluate_tiled(_compile(texts, variables, backend), u, v, out[:, first:first + len(v)])
+        del out
+    finally:
+        block.close()
+
+
+def evaluate_parallel(texts, variables, u, v, workers=None, backend='numpy', dtype=np.float64):
+    """Evaluate a custom surface over the ``u`` x ``v`` grid in worker processes.
+
+    ``texts`` holds the x, y and z expressions of a parametric surface, or a
+    single z expression for an explicit one. Returns a ``(3, V, U)`` array.
+    """
+    from graphity.isolation import (ISOLATED, JOB_TIMEOUT, WORKER_MEMORY_MB, EvaluationError,
+                                    EvaluationTimeout, get_isolated_pool)
+    workers = workers or WORKERS
+    # Surface syntax errors here rather than in a worker, parsing untrusted
+    # text in the isolated pool when it is enabled
+    if ISOLATED:
+        get_isolated_pool().check(texts, variables, backend)
+    else:
+        _compile(texts, variables, backend)
+    dtype = np.dtype(dtype)
+    shape = (3, len(v), len(u))
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    # Each worker maps the whole output block
+    if ISOLATED and nbytes > WORKER_MEMORY_MB * 1024 ** 2 // 2:
+        raise EvaluationError(f"A {len(u)}x{len(v)} grid needs {nbytes / 1024 ** 2:.0f} MB, "
+                              f"too much for the {WORKER_MEMORY_MB} MB worker memory limit")
+    block = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        pool = get_pool(workers)
+        rows = -(-len(v) // (workers * TILES_PER_WORKER))
+        jobs = [
+            pool.submit(_evaluate_rows, tuple(texts), tuple(variables), backend, u, v[first:first + rows],
+                        first, block.name, shape, dtype)
+            for first in range(0, len(v), rows)
+        ]
+        deadline = time.monotonic() + JOB_TIMEOUT if ISOLATED else None
+        try:
+            for job in jobs:
+                job.result(timeout=None if deadline is None else max(deadline - time.monotonic(), 0))
+        except TimeoutError:
+            _discard_pool(workers)
+            raise EvaluationTimeout(f"Evaluation took longer than {JOB_TIMEOUT:g} s and was stopped") from None
+        except BrokenProcessPool:
+            _discard_pool(workers)
+            raise EvaluationError("Evaluation worker exited unexpectedly (out of memory?)") from None
+        result = np.ndarray(shape, dtype=dtype, buffer=block.buf).copy()
+    finally:
+        block.close()
+        block.unlink()
+    return result
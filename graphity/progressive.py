@@ -0,0 +1,40 @@
+"""Coarse-to-fine evaluation on nested parameter grids."""
+
+import numpy as np
+
+from graphity.evaluation import parameter_grid
+
+
+def nested_indices(n, stride):
+    """Every ``stride``-th index of an axis of length ``n``, always keeping the last.
+
+    The index set for ``stride`` contains the one for ``2 * stride``, so the
+    grids of successive levels are nested.
+    """
+    return np.union1d(np.arange(0, n, stride), [n - 1])
+
+
+def progressive_levels(surface, u, v, levels=4, dtype=np.float64):
+    """Yield ``(3, rows, cols)`` coordinates on successively finer subgrids of the ``u`` x ``v`` grid.
+
+    Level ``k`` keeps every ``2**k``-th sample of each axis, from
+    ``2**(levels - 1)`` down to the full grid. ``surface(u, v)`` is only
+    called for samples that no coarser level has evaluated: the new rows
+    across all columns plus the new columns across the old rows. Both
+    blocks are evaluated on broadcastable axes, so the total work stays close
+    to a single evaluation of the final grid.
+    """
+    out = np.empty((3, len(v), len(u)), dtype=dtype)
+    rows = cols = np.empty(0, dtype=np.intp)
+    for level in reversed(range(levels)):
+        stride = 2 ** level
+        new_rows = np.setdiff1d(nested_indices(len(v), stride), rows)
+        new_cols = np.setdiff1d(nested_indices(len(u), stride), cols)
+        for block_rows, block_cols in ((rows, new_cols), (new_rows, np.union1d(cols, new_cols))):
+            if len(block_rows) and len(block_cols):
+                uu, vv = parameter_grid(u[block_cols], v[block_rows])
+                index = np.ix_(block_rows, block_cols)
+                for target, component in zip(out, surface(uu, vv)):
+                    target[index] = component
+        rows, cols = np.union1d(rows, new_rows), np.union1d(cols, new_cols)
+        yield out[(slice(None),) + np.ix_(rows, cols)]
@@ -0,0 +1,41 @@
+"""A spawn start method that does not re-run the Streamlit page in workers.
+
+Streamlit executes each page as ``__main__``, and a spawned child re-imports
+the parent's main module before running its target. For a page script that
+means rendering the whole page, and starting pools of its own, in every
+worker. The workers' targets all live in this package, so the main module
+is left out of the data sent to the child.
+"""
+
+import sys
+import threading
+import types
+from multiprocessing import context
+
+_bare_main = types.ModuleType('__main__')
+_main_lock = threading.Lock()
+
+
+class _Process(context.SpawnProcess):
+    @staticmethod
+    def _Popen(process_obj):
+        # The swap only lasts while the child's start-up data is gathered
+        with _main_lock:
+            main = sys.modules['__main__']
+            sys.modules['__main__'] = _bare_main
+            try:
+                return context.SpawnProcess._Popen(process_obj)
+            finally:
+                sys.modules['__main__'] = main
+
+
+class _Context(context.SpawnContext):
+    Process = _Process
+
+
+_context = _Context()
+
+
+def spawn_context():
+    """Multiprocessing context for package worker processes."""
+    return _context
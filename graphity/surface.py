@@ -0,0 +1,87 @@
+"""Evaluated surfaces as one coordinate buffer with statistics computed once.
+
+The evaluation paths all fill a single ``(3, ...)`` array. ``SurfaceMesh``
+keeps that buffer as is, with x, y and z as views of it, and scans it once
+on construction for the bounds and the NaN count. Axis ranges, color
+limits, export and the caches then read those instead of rescanning the
+coordinates, and the buffer is made read-only so they stay valid.
+"""
+
+import numpy as np
+
+# Samples per component scanned together, so a block of all three stays in
+# cache while its minimum, maximum and NaN count are taken
+BLOCK_SAMPLES = 16_384
+
+
+def _statistics(points):
+    """Per-component NaN-ignoring minimum and maximum, and the NaN count, in one pass."""
+    flat = points.reshape(3, -1)
+    low = np.full(3, np.inf)
+    high = np.full(3, -np.inf)
+    nan_count = 0
+    for start in range(0, flat.shape[1], BLOCK_SAMPLES):
+        block = flat[:, start:start + BLOCK_SAMPLES]
+        np.fmin(low, np.fmin.reduce(block, axis=1), out=low)
+        np.fmax(high, np.fmax.reduce(block, axis=1), out=high)
+        nan_count += np.count_nonzero(np.isnan(block))
+    # Components without a single finite sample have no bounds
+    empty = low > high
+    low[empty] = high[empty] = np.nan
+    return low, high, nan_count
+
+
+class SurfaceMesh:
+    """Coordinates of an evaluated surface and what is known about them.
+
+    ``points`` is the ``(3, ...)`` coordinate buffer: ``(3, V, U)`` for a
+    grid, ``(3, N)`` for the vertices of ``triangles`` (an ``(M, 3)`` int32
+    index buffer), or ``(3, T, V, U)`` for animation frames. ``key`` is the
+    geometry key of the parameters the surface was evaluated from, if known.
+    """
+
+    __slots__ = ('points', 'triangles', 'title', 'key', 'low', 'high', 'center', 'extent', 'nan_count')
+
+    def __init__(self, points, title, triangles=None, key=None):
+        points = np.asarray(points)
+        if points.shape[:1] != (3,):
+            raise ValueError(f"expected a (3, ...) coordinate buffer, got shape {points.shape}")
+        points.setflags(write=False)
+        if triangles is not None:
+            triangles.setflags(write=False)
+        self.points = points
+        self.triangles = triangles
+        self.title = title
+        self.key = key
+        self.low, self.high, self.nan_count = _statistics(points)
+        self.center = (self.low + self.high) / 2
+        self.extent = self.high - self.low
+
+    @classmethod
+    def from_components(cls, x, y, z, title, triangles=None, key=None):
+        """A mesh from separate coordinate arrays, copied into one buffer."""
+        return cls(np.stack([x, y, z]), title, triangles, key)
+
+    @property
+    def x(self):
+        return self.points[0]
+
+    @property
+    def y(self):
+        return self.points[1]
+
+    @property
+    def z(self):
+        return self.points[2]
+
+    @property
+    def dtype(self):
+        return self.points.dtype
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + (0 if self.triangles is None else self.triangles.nbytes)
+
+    def __repr__(self):
+        kind = f", {len(self.triangles)} triangles" if self.triangles is not None else ""
+        return f"SurfaceMesh({self.title!r}, shape={self.points.shape[1:]}{kind}, dtype={self.dtype})"
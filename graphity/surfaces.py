@@ -0,0 +1,404 @@
+"""Registry of the surfaces Graphity draws, and their evaluation.
+
+Each entry declares a surface: its point-wise generator or expressions, its
+parameters with their ranges and defaults, its (u, v) domain, what can be
+animated and the text shown about it. The pages build their controls and
+dispatch from this table, and the same engine runs headless::
+
+    from graphity.surfaces import evaluate_surface
+    mesh = evaluate_surface("Torus", 200, 100, {'torus_R': 3.0})
+
+Parameter dicts are keyed by ``Parameter.key`` and ``Expression.key``;
+missing entries take their defaults.
+"""
+
+import textwrap
+
+import numpy as np
+
+from graphity.animation import evaluate_frames
+from graphity.evaluation import materialize, parameter_grid
+from graphity.expressions import compile_explicit, compile_surface
+from graphity.isolation import ISOLATED, get_isolated_pool
+from graphity.parallel import evaluate_parallel, use_process_pool
+from graphity.surface import SurfaceMesh
+from graphity.threaded import evaluate_threaded
+from graphity.tiling import evaluate_tiled
+
+
+class Parameter:
+    """A numeric parameter of a surface.
+
+    ``argument`` is its name in the generator's signature (``key`` by
+    default). Parameters with ``low`` and ``high`` are drawn as sliders,
+    others as number inputs.
+    """
+
+    __slots__ = ('key', 'label', 'default', 'low', 'high', 'step', 'argument')
+
+    def __init__(self, key, label, default, low=None, high=None, step=None, argument=None):
+        self.key = key
+        self.label = label
+        self.default = default
+        self.low = low
+        self.high = high
+        self.step = step
+        self.argument = argument or key
+
+
+class Expression:
+    """An expression of the surface's variables, entered as text.
+
+    ``widget`` names its input when ``key`` is shared with another surface.
+    """
+
+    __slots__ = ('key', 'label', 'default', 'widget')
+
+    def __init__(self, key, label, default, widget=None):
+        self.key = key
+        self.label = label
+        self.default = default
+        self.widget = widget or key
+
+
+class Sweep:
+    """The parameter an animation varies, and the range offered for it."""
+
+    __slots__ = ('key', 'label', 'low', 'high', 'default', 'step', 'prefix', 'widget')
+
+    def __init__(self, key, label, low, high, default, step, prefix, widget):
+        self.key = key
+        self.label = label
+        self.low = low
+        self.high = high
+        self.default = default
+        self.step = step
+        self.prefix = prefix
+        self.widget = widget
+
+
+class Surface:
+    """A registered surface.
+
+    Predefined surfaces have ``points(u, v, **arguments)``; custom ones have
+    ``expressions`` of ``variables`` instead. The ends of ``u_range`` and
+    ``v_range`` are numbers or parameter keys. ``info`` is Markdown,
+    formatted with the parameters.
+    """
+
+    __slots__ = ('name', 'points', 'expressions', 'variables', 'parameters', 'u_range', 'v_range',
+                 'sweep', 'heading', 'hint', 'info')
+
+    def __init__(self, name, u_range, v_range, info, points=None, expressions=(), variables=('u', 'v'),
+                 parameters=(), sweep=None, heading=None, hint=None):
+        self.name = name
+        self.points = points
+        self.expressions = expressions
+        self.variables = variables
+        self.parameters = parameters
+        self.u_range = u_range
+        self.v_range = v_range
+        self.sweep = sweep
+        self.heading = heading
+        self.hint = hint
+        self.info = info
+
+    @property
+    def custom(self):
+        return self.points is None
+
+    def defaults(self):
+        """The parameter dict with every entry at its default."""
+        fields = self.expressions + self.parameters
+        return {field.key: field.default for field in fields}
+
+    def resolve(self, params=None):
+        """``params`` completed with the defaults."""
+        return dict(self.defaults(), **(params or {}))
+
+    def domain(self, params):
+        """Numeric ``(u_range, v_range)`` under ``params``."""
+        return tuple(tuple(params[end] if isinstance(end, str) else end for end in axis_range)
+                     for axis_range in (self.u_range, self.v_range))
+
+    def describe(self, params=None):
+        """The info text with the parameters filled in."""
+        return textwrap.dedent(self.info).format(**self.resolve(params))
+
+
+# Point-wise equations of the predefined surfaces; u and v can be any
+# broadcastable arrays (grid axes or scattered samples)
+def mobius_strip_points(u, v):
+    x = (1 + 0.5 * v * np.cos(u / 2)) * np.cos(u)
+    y = (1 + 0.5 * v * np.cos(u / 2)) * np.sin(u)
+    z = 0.5 * v * np.sin(u / 2)
+    return x, y, z
+
+
+def klein_bottle_points(u, v):
+    r = 4 * (1 - np.cos(u) / 2)
+    x = 6 * np.cos(u) * (1 + np.sin(u)) + r * np.cos(v + np.pi)
+    y = 16 * np.sin(u)
+    z = 6 * np.cos(u) * (1 + np.sin(u)) + r * np.sin(v)
+    return x, y, z
+
+
+def torus_points(u, v, R=2, r=0.5):
+    x = (R + r * np.cos(v)) * np.cos(u)
+    y = (R + r * np.cos(v)) * np.sin(u)
+    z = r * np.sin(v)
+    return x, y, z
+
+
+def sphere_points(u, v, r=1):
+    x = r * np.sin(v) * np.cos(u)
+    y = r * np.sin(v) * np.sin(u)
+    z = r * np.cos(v)
+    return x, y, z
+
+
+_TIME_SWEEP = Sweep('t', "Time Range (t)", 0.0, 20.0, (0.0, 6.3), 0.1, "t = ", 'sweep_t')
+
+SURFACES = {surface.name: surface for surface in (
+    Surface(
+        "Möbius Strip", (0, 2 * np.pi), (-1, 1), points=mobius_strip_points,
+        info="""
+        ### Möbius Strip
+
+        **Mathematical Definition:**
+        A non-orientable surface with only one side and one boundary component.
+
+        **Parametric Equations:**
+        ```
+        x = (1 + (v/2)cos(u/2))cos(u)
+        y = (1 + (v/2)cos(u/2))sin(u)
+        z = (v/2)sin(u/2)
+        ```
+        Where:
+        - u ∈ [0, 2π) (angular parameter)
+        - v ∈ [-1, 1] (width parameter)
+
+        **Key Properties:**
+        - Single-sided surface
+        - Non-orientable
+        - Euler characteristic: χ = 0
+        - Requires 720° rotation to return to initial state
+        """),
+    Surface(
+        "Klein Bottle", (0, 2 * np.pi), (0, 2 * np.pi), points=klein_bottle_points,
+        info="""
+        ### Klein Bottle
+
+        **Mathematical Definition:**
+        A non-orientable surface with no boundary that cannot be embedded in three-dimensional space without intersecting itself.
+
+        **Key Properties:**
+        - Non-orientable surface
+        - Has no inside or outside
+        - Cannot be properly embedded in 3D space
+        - Self-intersects in this 3D representation
+        - Euler characteristic: χ = 0
+
+        The representation shown is a common visualization of the Klein bottle in 3D space, though a true Klein bottle requires 4D space to exist without self-intersection.
+        """),
+    Surface(
+        "Torus", (0, 2 * np.pi), (0, 2 * np.pi), points=torus_points,
+        parameters=(Parameter('torus_R', "Major Radius (R)", 2.0, 0.5, 5.0, 0.1, argument='R'),
+                    Parameter('torus_r', "Minor Radius (r)", 0.5, 0.1, 3.0, 0.1, argument='r')),
+        sweep=Sweep('torus_R', "Sweep Major Radius (R)", 0.5, 5.0, (1.0, 3.0), 0.1, "R = ", 'sweep_R'),
+        info="""
+        ### Torus
+
+        **Mathematical Definition:**
+        A surface of revolution generated by revolving a circle around an axis coplanar with the circle.
+
+        **Parametric Equations:**
+        ```
+        x = (R + r*cos(v))*cos(u)
+        y = (R + r*cos(v))*sin(u)
+        z = r*sin(v)
+        ```
+        Where:
+        - R = {torus_R} (major radius)
+        - r = {torus_r} (minor radius)
+        - u, v ∈ [0, 2π)
+
+        **Key Properties:**
+        - Orientable surface
+        - Genus 1 (it has one "hole")
+        - Euler characteristic: χ = 0
+        """),
+    Surface(
+        "Sphere", (0, 2 * np.pi), (0, np.pi), points=sphere_points,
+        parameters=(Parameter('sphere_r', "Radius", 1.0, 0.1, 5.0, 0.1, argument='r'),),
+        sweep=Sweep('sphere_r', "Sweep Radius", 0.1, 5.0, (0.5, 2.0), 0.1, "r = ", 'sweep_radius'),
+        info="""
+        ### Sphere
+
+        **Mathematical Definition:**
+        The set of all points in 3D space that are equidistant from a fixed point (the center).
+
+        **Parametric Equations:**
+        ```
+        x = r*sin(v)*cos(u)
+        y = r*sin(v)*sin(u)
+        z = r*cos(v)
+        ```
+        Where:
+        - r = {sphere_r} (radius)
+        - u ∈ [0, 2π) (longitude)
+        - v ∈ [0, π] (latitude)
+
+        **Key Properties:**
+        - Orientable surface
+        - Surface area = 4πr²
+        - Volume = (4/3)πr³
+        - Euler characteristic: χ = 2
+        """),
+    Surface(
+        "Custom Parametric Surface", ('u_min', 'u_max'), ('v_min', 'v_max'),
+        expressions=(Expression('x_expr', "x(u,v) = ", "(1 + 0.5*cos(v))*cos(u)"),
+                     Expression('y_expr', "y(u,v) = ", "(1 + 0.5*cos(v))*sin(u)"),
+                     Expression('z_expr', "z(u,v) = ", "0.5*sin(v)")),
+        parameters=(Parameter('u_min', "u min", 0.0), Parameter('u_max', "u max", 2 * np.pi),
+                    Parameter('v_min', "v min", 0.0), Parameter('v_max', "v max", 2 * np.pi)),
+        sweep=_TIME_SWEEP, heading="Define Parametric Equations", hint="Use `u` and `v` as parameters",
+        info="""
+        ### Custom Parametric Surface
+
+        **Equations:**
+        ```
+        x(u,v) = {x_expr}
+        y(u,v) = {y_expr}
+        z(u,v) = {z_expr}
+        ```
+
+        **Parameter Ranges:**
+        - u ∈ [{u_min}, {u_max}]
+        - v ∈ [{v_min}, {v_max}]
+        """),
+    Surface(
+        "Custom Explicit Surface z=f(x,y)", ('x_min', 'x_max'), ('y_min', 'y_max'), variables=('x', 'y'),
+        expressions=(Expression('z_expr', "z(x,y) = ", "sin(sqrt(x**2 + y**2))", widget='z_expr_explicit'),),
+        parameters=(Parameter('x_min', "x min", -5.0), Parameter('x_max', "x max", 5.0),
+                    Parameter('y_min', "y min", -5.0), Parameter('y_max', "y max", 5.0)),
+        sweep=_TIME_SWEEP, heading="Define Function", hint="Use `x` and `y` as variables",
+        info="""
+        ### Custom Explicit Surface
+
+        **Equation:**
+        ```
+        z(x,y) = {z_expr}
+        ```
+
+        **Domain:**
+        - x ∈ [{x_min}, {x_max}]
+        - y ∈ [{y_min}, {y_max}]
+        """),
+)}
+
+
+def _arguments(surface, params):
+    return {parameter.argument: params[parameter.key] for parameter in surface.parameters}
+
+
+def _texts(surface, params):
+    return tuple(params[expression.key] for expression in surface.expressions)
+
+
+def _compile(surface, texts, variables, backend):
+    # Explicit surfaces compile their single z expression into a kernel that
+    # also writes the x and y axes
+    if len(texts) == 1:
+        return compile_explicit(texts[0], variables, backend)
+    return compile_surface(texts, variables, backend)
+
+
+def surface_points(name, params=None, dtype=np.float64, backend='numpy'):
+    """Point-wise function, ``u_range`` and ``v_range`` of surface ``name``.
+
+    The function takes broadcastable ``u`` and ``v`` arrays, as adaptive and
+    progressive sampling need, and returns ``(x, y, z)``.
+    """
+    surface = SURFACES[name]
+    params = surface.resolve(params)
+    u_range, v_range = surface.domain(params)
+    if not surface.custom:
+        arguments = _arguments(surface, params)
+        return (lambda u, v: surface.points(u, v, **arguments)), u_range, v_range
+
+    texts, variables = _texts(surface, params), surface.variables
+    if ISOLATED:
+        # Each batch of samples is a worker job with a timeout and memory cap
+        def points(u, v):
+            return get_isolated_pool().evaluate_points(texts, variables, u, v, backend=backend, dtype=dtype)
+        return points, u_range, v_range
+
+    kernel = _compile(surface, texts, variables, backend)
+
+    def points(u, v):
+        shape = np.broadcast_shapes(np.shape(u), np.shape(v))
+        return kernel(u, v, np.empty((3,) + shape, dtype=dtype))
+    return points, u_range, v_range
+
+
+def evaluate_surface(name, u_res, v_res, params=None, dtype=np.float64, threaded=False, backend='numpy'):
+    """Surface ``name`` on a ``u_res`` x ``v_res`` grid, as a ``(3, V, U)`` ``SurfaceMesh``.
+
+    Custom expressions run on the first of these that applies: the process
+    pool for large grids, the isolated worker, the thread pool (one kernel
+    per component, if ``threaded``), or tiled in-process evaluation.
+    """
+    surface = SURFACES[name]
+    params = surface.resolve(params)
+    (u_min, u_max), (v_min, v_max) = surface.domain(params)
+    u = np.linspace(u_min, u_max, u_res, dtype=dtype)
+    v = np.linspace(v_min, v_max, v_res, dtype=dtype)
+    if not surface.custom:
+        uu, vv = parameter_grid(u, v)
+        points = surface.points(uu, vv, **_arguments(surface, params))
+        return SurfaceMesh(materialize((v_res, u_res), *points, dtype=dtype), name)
+
+    texts, variables = _texts(surface, params), surface.variables
+    if use_process_pool(u_res * v_res):
+        points = evaluate_parallel(texts, variables, u, v, backend=backend, dtype=dtype)
+    elif ISOLATED:
+        # Parsing and evaluation run in a worker with a timeout and memory cap
+        points = get_isolated_pool().evaluate(texts, variables, u, v, threaded=threaded,
+                                              backend=backend, dtype=dtype)
+    elif threaded and len(texts) > 1:
+        # One kernel per component so x, y and z run concurrently
+        kernels = [(compile_surface((text,), variables, backend), n, 1) for n, text in enumerate(texts)]
+        points = evaluate_threaded(kernels, u, v, dtype=dtype)
+    elif threaded:
+        points = evaluate_threaded([(_compile(surface, texts, variables, backend), 0, 3)], u, v, dtype=dtype)
+    else:
+        # x, y and z share one kernel so common subterms are evaluated once
+        points = evaluate_tiled(_compile(surface, texts, variables, backend), u, v, dtype=dtype)
+    return SurfaceMesh(points, name)
+
+
+def evaluate_animation(name, u_res, v_res, frames, sweep, params=None, dtype=np.float64, backend='numpy'):
+    """Every frame of an animation of ``name`` at once, as a ``(3, T, V, U)`` ``SurfaceMesh``.
+
+    The surface's sweep parameter (the time ``t`` of custom surfaces) takes
+    ``frames`` values across the ``sweep`` range, along the T axis.
+    """
+    surface = SURFACES[name]
+    params = surface.resolve(params)
+    (u_min, u_max), (v_min, v_max) = surface.domain(params)
+    u = np.linspace(u_min, u_max, u_res, dtype=dtype)
+    v = np.linspace(v_min, v_max, v_res, dtype=dtype)
+    t = np.linspace(*sweep, frames, dtype=dtype)
+    if not surface.custom:
+        arguments = _arguments(surface, params)
+        arguments[next(p.argument for p in surface.parameters if p.key == surface.sweep.key)] = t[:, None, None]
+        points = surface.points(u[None, None, :], v[None, :, None], **arguments)
+        return SurfaceMesh(materialize((frames, v_res, u_res), *points, dtype=dtype), name)
+
+    texts, variables = _texts(surface, params), surface.variables + ('t',)
+    if ISOLATED:
+        points = get_isolated_pool().evaluate_frames(texts, variables, u, v, t, backend=backend, dtype=dtype)
+    else:
+        points = evaluate_frames(_compile(surface, texts, variables, backend), u, v, t, dtype=dtype)
+    return SurfaceMesh(points, name)
@@ -0,0 +1,161 @@
+"""Sympy-based kernel generation for user-entered expressions.
+
+Expressions the native compiler (``graphity.native``) does not support are
+parsed with sympy, simplified across outputs with common-subexpression
+elimination and printed as NumPy code. This module is imported on first use
+so a session that only needs the native compiler never imports sympy.
+"""
+
+import functools
+
+import numpy as np
+import sympy as sp
+from sympy.parsing.sympy_parser import parse_expr
+from sympy.printing.numpy import NumPyPrinter
+
+from graphity.expressions import normalize_expression
+from graphity.jit import jit_available, jit_kernel
+
+
+def parse_expressions(texts, variables):
+    """Parse ``texts`` and check they only use the given variable names."""
+    symbols = sp.symbols(tuple(variables))
+    # ``e`` is Euler's number, as in the native compiler, rather than a free symbol
+    exprs = [parse_expr(normalize_expression(text), local_dict={'e': sp.E}) for text in texts]
+    unknown = set().union(*(expr.free_symbols for expr in exprs)) - set(symbols)
+    if unknown:
+        names = ", ".join(sorted(str(symbol) for symbol in unknown))
+        raise ValueError(f"Unknown symbol(s) {names}; use {', '.join(variables)}")
+    return symbols, exprs
+
+
+# Top-level operations that can be written straight into the output array
+# with the ufunc ``out=`` argument instead of through a temporary.
+_NARY_UFUNCS = {sp.Add: 'numpy.add', sp.Mul: 'numpy.multiply'}
+_UNARY_UFUNCS = {
+    sp.sin: 'numpy.sin', sp.cos: 'numpy.cos', sp.tan: 'numpy.tan',
+    sp.asin: 'numpy.arcsin', sp.acos: 'numpy.arccos', sp.atan: 'numpy.arctan',
+    sp.sinh: 'numpy.sinh', sp.cosh: 'numpy.cosh', sp.tanh: 'numpy.tanh',
+    sp.exp: 'numpy.exp', sp.log: 'numpy.log',
+}
+
+
+def _dependencies(expr, dependencies):
+    """Kernel arguments ``expr`` depends on, looking through temporaries."""
+    found = set()
+    for symbol in expr.free_symbols:
+        found |= dependencies.get(symbol, {symbol})
+    return frozenset(found)
+
+
+def separate_axes(replacements, outputs):
+    """Hoist single-variable parts of sums and products into temporaries.
+
+    With the kernel arguments passed as broadcastable 1D views (see
+    ``graphity.evaluation.parameter_grid``), a temporary depending on one
+    variable stays 1D, so e.g. ``2*u*cos(u)*v`` costs one full-grid multiply
+    instead of three. Constant factors are folded into the narrowest group.
+    """
+    generator = sp.numbered_symbols('_axis')
+    dependencies = {}
+    statements = []
+
+    def split(expr):
+        if expr.is_Atom:
+            return expr
+        expr = expr.func(*(split(arg) for arg in expr.args))
+        if expr.func not in (sp.Add, sp.Mul):
+            return expr
+        groups = {}
+        for arg in expr.args:
+            groups.setdefault(_dependencies(arg, dependencies), []).append(arg)
+        constants = groups.pop(frozenset(), [])
+        if len(groups) < 2:
+            return expr
+        pieces = []
+        for deps, members in sorted(groups.items(), key=lambda item: (len(item[0]), sorted(map(str, item[0])))):
+            members, constants = constants + members, []
+            if len(deps) == 1 and len(members) > 1:
+                symbol = next(generator)
+                dependencies[symbol] = deps
+                statements.append((symbol, expr.func(*members)))
+                pieces.append(symbol)
+            else:
+                pieces.extend(members)
+        return expr.func(*pieces)
+
+    for symbol, expr in replacements:
+        expr = split(expr)
+        dependencies[symbol] = _dependencies(expr, dependencies)
+        statements.append((symbol, expr))
+    outputs = [split(expr) for expr in outputs]
+    return statements, outputs
+
+
+def _store(printer, expr, target, full):
+    """Statements writing ``expr`` into the array ``target``.
+
+    Results that depend on every kernel argument are written in place through
+    the ufunc ``out=`` argument. Narrower results are computed at their own
+    (broadcastable) shape and then copied, since ``out=`` would make the ufunc
+    run once per output element.
+    """
+    if full and expr.func in _NARY_UFUNCS and len(expr.args) >= 2:
+        ufunc = _NARY_UFUNCS[expr.func]
+        first, second, *rest = (printer.doprint(arg) for arg in expr.args)
+        lines = [f"{ufunc}({first}, {second}, out={target})"]
+        lines.extend(f"{ufunc}({target}, {arg}, out={target})" for arg in rest)
+        return lines
+    if full and expr.func in _UNARY_UFUNCS and len(expr.args) == 1:
+        return [f"{_UNARY_UFUNCS[expr.func]}({printer.doprint(expr.args[0])}, out={target})"]
+    return [f"{target}[...] = {printer.doprint(expr)}"]
+
+
+def kernel_source(name, args, replacements, outputs):
+    """Python source for a kernel writing each of ``outputs`` into ``_out[i]``.
+
+    ``replacements`` are ``(symbol, expr)`` pairs from ``sympy.cse`` and are
+    evaluated once, in order, before any output. Each one is released right
+    after its last use to keep the number of live temporaries low.
+    """
+    printer = NumPyPrinter()
+    dependencies = {}
+    for symbol, expr in replacements:
+        dependencies[symbol] = _dependencies(expr, dependencies)
+    statements = [(symbol, expr) for symbol, expr in replacements]
+    statements += [(f"_out[{i}]", expr) for i, expr in enumerate(outputs)]
+    last_use = {}
+    for index, (_, expr) in enumerate(statements):
+        for symbol in expr.free_symbols:
+            last_use[symbol] = index
+
+    lines = [f"def {name}({', '.join(str(arg) for arg in args)}, _out):"]
+    for index, (target, expr) in enumerate(statements):
+        if isinstance(target, str):
+            full = _dependencies(expr, dependencies) == frozenset(args)
+            lines.extend("    " + line for line in _store(printer, expr, target, full))
+        else:
+            lines.append(f"    {target} = {printer.doprint(expr)}")
+        released = sorted(str(symbol) for symbol, _ in replacements if last_use.get(symbol) == index)
+        if released:
+            lines.append(f"    del {', '.join(released)}")
+    lines.append("    return _out")
+    return "\n".join(lines) + "\n"
+
+
+def symbolic_kernel(texts, variables, backend='numpy'):
+    """Fused kernel for normalized ``texts``; see ``compile_surface``."""
+    symbols, exprs = parse_expressions(texts, variables)
+    replacements, outputs = sp.cse(exprs, symbols=sp.numbered_symbols('_cse'))
+    separated, separated_outputs = separate_axes(replacements, outputs)
+    source = kernel_source('_kernel', symbols, separated, separated_outputs)
+    # NumPyPrinter emits functools.reduce for Max/Min with several arguments
+    namespace = {'numpy': np, 'functools': functools}
+    exec(compile(source, f"<graphity kernel {texts!r}>", 'exec'), namespace)
+    kernel = namespace['_kernel']
+    kernel.source = source
+    kernel.backend = 'numpy'
+    # Unavailable backends fall back to NumPy
+    if backend == 'numba' and jit_available():
+        kernel = jit_kernel(symbols, replacements, outputs, kernel, f"<graphity loop {texts!r}>")
+    return kernel
@@ -0,0 +1,57 @@
+"""Thread-pool evaluation of surface components and row chunks.
+
+NumPy ufuncs release the GIL, so independent kernels (one per coordinate)
+and row chunks of large grids can run concurrently in threads without the
+start-up and transfer costs of a process pool.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from graphity.evaluation import parameter_grid
+
+# Opt-in; GRAPHITY_THREADED=1 turns it on by default for the explorer
+THREADED = os.environ.get('GRAPHITY_THREADED', '0') == '1'
+THREADS = int(os.environ.get('GRAPHITY_THREADS', os.cpu_count() or 1))
+
+# Grids are cut into row chunks of at least this many samples per task
+CHUNK_SAMPLES = 65_536
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(threads=None):
+    """The shared pool with ``threads`` threads, started on first use."""
+    threads = threads or THREADS
+    with _executors_lock:
+        executor = _executors.get(threads)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='graphity')
+            _executors[threads] = executor
+        return executor
+
+
+def evaluate_threaded(kernels, u, v, out=None, threads=None, dtype=np.float64):
+    """Evaluate several kernels over the ``u`` x ``v`` grid concurrently.
+
+    ``kernels`` is a list of ``(kernel, first, count)`` triples; each kernel
+    fills components ``first:first + count`` of ``out`` (shape
+    ``(3, len(v), len(u))``). Every kernel is further split into row chunks
+    of about ``CHUNK_SAMPLES`` points, and all pieces run in the shared pool.
+    """
+    if out is None:
+        out = np.empty((3, len(v), len(u)), dtype=dtype)
+    rows = max(1, CHUNK_SAMPLES // max(len(u), 1))
+    jobs = []
+    executor = get_executor(threads)
+    for kernel, first, count in kernels:
+        for start in range(0, len(v), rows):
+            uu, vv = parameter_grid(u, v[start:start + rows])
+            jobs.append(executor.submit(kernel, uu, vv, out[first:first + count, start:start + rows]))
+    for job in jobs:
+        job.result()
+    return out
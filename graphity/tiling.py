@@ -0,0 +1,93 @@
+"""Memory-bounded evaluation of large grids in row blocks."""
+
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+from graphity.evaluation import parameter_grid
+
+DEFAULT_TILE_BUDGET_MB = 64
+
+# Rough number of full-size temporaries a kernel keeps alive at once; used to
+# turn the byte budget into a row count.
+DEFAULT_TEMPORARIES = 8
+
+tile_budget_bytes = int(float(os.environ.get('GRAPHITY_TILE_BUDGET_MB', DEFAULT_TILE_BUDGET_MB)) * 1024 ** 2)
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def tile_rows(n_cols, itemsize, budget_bytes=None, temporaries=DEFAULT_TEMPORARIES):
+    """Number of grid rows whose temporaries fit in ``budget_bytes``."""
+    if budget_bytes is None:
+        budget_bytes = tile_budget_bytes
+    return max(1, budget_bytes // (n_cols * itemsize * temporaries))
+
+
+def open_output(shape, dtype=np.float64, path=None):
+    """Preallocated output array, memory-mapped to a ``.npy`` file if ``path`` is given."""
+    if path is None:
+        return np.empty(shape, dtype=dtype)
+    return np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+
+def evaluate_tiled(kernel, u, v, out=None, budget_bytes=None, dtype=np.float64):
+    """Evaluate ``kernel`` over the ``u`` x ``v`` grid one block of rows at a time.
+
+    ``kernel(u, v, out)`` has the signature of the compiled surface kernels:
+    it fills an ``(n, rows, cols)`` block from broadcastable ``u`` and ``v``.
+    Each block is written straight into ``out`` (shape ``(n, len(v), len(u))``,
+    three components if allocated here), so memory beyond the output stays
+    within the budget regardless of grid size.
+    """
+    if out is None:
+        out = open_output((3, len(v), len(u)), dtype)
+    rows = tile_rows(len(u), out.dtype.itemsize, budget_bytes)
+    for start in range(0, len(v), rows):
+        uu, vv = parameter_grid(u, v[start:start + rows])
+        kernel(uu, vv, out[:, start:start + rows])
+    return out
+
+
+def export_npy(path, kernel, u, v, budget_bytes=None, dtype=np.float64):
+    """Evaluate a surface tile by tile into a ``(3, V, U)`` ``.npy`` file.
+
+    Each tile is computed in memory and copied through short-lived mappings
+    of just its rows, so written pages do not accumulate in the resident set
+    the way they would with one mapping of the whole file. Returns a small
+    report with the elapsed time, number of tiles and the process's peak RSS.
+    """
+    start = time.perf_counter()
+    dtype = np.dtype(dtype)
+    shape = (3, len(v), len(u))
+    header = open_output(shape, dtype, path)
+    offset = header.offset
+    del header
+
+    rows = tile_rows(len(u), dtype.itemsize, budget_bytes)
+    tiles = 0
+    for first in range(0, len(v), rows):
+        block = v[first:first + rows]
+        uu, vv = parameter_grid(u, block)
+        values = kernel(uu, vv, np.empty((3, len(block), len(u)), dtype=dtype))
+        for component in range(3):
+            start_byte = offset + (component * len(v) + first) * len(u) * dtype.itemsize
+            target = np.memmap(path, dtype=dtype, mode='r+', offset=start_byte, shape=(len(block), len(u)))
+            target[...] = values[component]
+            del target
+        tiles += 1
+    return {
+        'path': path,
+        'shape': shape,
+        'tiles': tiles,
+        'seconds': time.perf_counter() - start,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
@@ -0,0 +1,40 @@
+"""Wireframe geometry for gridded surfaces as a single line trace."""
+
+import os
+
+import numpy as np
+
+from graphity.progressive import nested_indices
+
+# Above this many grid lines in either direction, only every k-th is drawn
+DEFAULT_MAX_LINES = 100
+max_lines = int(os.environ.get('GRAPHITY_WIREFRAME_MAX_LINES', DEFAULT_MAX_LINES))
+
+
+def _line_indices(n, limit):
+    """Indices of the lines to draw out of ``n``, at most about ``limit``."""
+    if not limit or n <= limit:
+        return np.arange(n)
+    return nested_indices(n, -(-(n - 1) // (limit - 1)))
+
+
+def _polylines(lines):
+    """``(count, length)`` polylines flattened with a NaN after each one."""
+    out = np.full((lines.shape[0], lines.shape[1] + 1), np.nan, dtype=lines.dtype)
+    out[:, :-1] = lines
+    return out.ravel()
+
+
+def grid_lines(x, y, z, limit=None):
+    """Iso-u and iso-v polylines of a ``(V, U)`` grid, NaN-separated for one trace.
+
+    Every row and every column becomes one polyline at full resolution along
+    its length. If there are more than ``limit`` rows (or columns), every
+    k-th one is kept, always including the last, so the wireframe stays
+    readable and light at high resolutions. ``limit`` defaults to
+    ``max_lines``; pass 0 to draw every line.
+    """
+    limit = max_lines if limit is None else limit
+    rows = _line_indices(x.shape[0], limit)
+    cols = _line_indices(x.shape[1], limit)
+    return [np.concatenate([_polylines(c[rows, :]), _polylines(c[:, cols].T)]) for c in (x, y, z)]
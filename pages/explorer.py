@@ -1,17 +1,27 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.colors as mcolors
-from matplotlib.colors import LinearSegmentedColormap
-import sympy as sp
-from sympy.parsing.sympy_parser import parse_expr
-from sympy.utilities.lambdify import lambdify
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import base64
+import time
 from io import BytesIO
 
+from graphity import STYLE_PARAMS, figure_cache, geometry_cache, geometry_key
+from graphity.adaptive import adaptive_mesh, mesh_edge_lines
+from graphity.animation import (MAX_FRAMES, SURFACE_FRAME_RATE, data_frames, frame_budget, frame_slider,
+                                orbit_frames, play_buttons)
+from graphity.budget import choose_resolution, cost_key, evaluation_costs, latency_budget_ms, render_costs
+from graphity.colormaps import colormap_names, plotly_colorscale
+from graphity.controls import surface_controls
+from graphity.encoding import typed_array
+from graphity.isolation import ISOLATED
+from graphity.jit import BACKEND, jit_available
+from graphity.lod import display_triangles, simplify_mesh
+from graphity.mesh import weld_grid
+from graphity.progressive import progressive_levels
+from graphity.surface import SurfaceMesh
+from graphity.surfaces import SURFACES, evaluate_animation, evaluate_surface, surface_points
+from graphity.threaded import THREADED
+from graphity.wireframe import grid_lines
+
 
 # Add callback functions for automatic updates
 def on_graph_type_change():
@@ -25,6 +35,9 @@ def on_equation_submit():
 
 DEFAULT_U_RES = 100
 DEFAULT_V_RES = 50
+PROGRESSIVE_LEVELS = 4  # Coarsest preview keeps every 8th sample
+
+INTERACTIVE_CONTROLS_HINT = "**Interactive Controls**: Click and drag to rotate, scroll to zoom, shift+click to pan."
 
 # Page title
 st.set_page_config(
@@ -38,8 +51,7 @@ query_params = st.query_params
 default_graph = "Möbius Strip"  # Default selection
 
 if "graph" in query_params:
-    if query_params["graph"][0] in ["Möbius Strip", "Klein Bottle", "Torus", "Sphere", 
-                                   "Custom Parametric Surface", "Custom Explicit Surface z=f(x,y)"]:
+    if query_params["graph"][0] in SURFACES:
         default_graph = query_params["graph"][0]
 
 # Add a button to return to the home page
@@ -149,139 +161,179 @@ st.markdown('''
 # Header with gradient background
 st.markdown("<h1 class='main-header'>Graphity</h1>", unsafe_allow_html=True)
 
-# Function to create predefined graphs
-def create_mobius_strip(u_res, v_res):
-    u = np.linspace(0, 2 * np.pi, u_res)
-    v = np.linspace(-1, 1, v_res)
-    u, v = np.meshgrid(u, v)
-    
-    x = (1 + 0.5 * v * np.cos(u / 2)) * np.cos(u)
-    y = (1 + 0.5 * v * np.cos(u / 2)) * np.sin(u)
-    z = 0.5 * v * np.sin(u / 2)
-    
-    return x, y, z, "Möbius Strip"
+# Equal axis ranges around the surface so it is drawn undistorted, from the
+# bounds the mesh computed when it was evaluated
+def axis_ranges(mesh):
+    max_range = mesh.extent.max() / 2.0
+    return tuple([float(mid - max_range), float(mid + max_range)] for mid in mesh.center)
 
-def create_klein_bottle(u_res, v_res):
-    u = np.linspace(0, 2 * np.pi, u_res)
-    v = np.linspace(0, 2 * np.pi, v_res)
-    u, v = np.meshgrid(u, v)
-    
-    r = 4 * (1 - np.cos(u) / 2)
-    
-    x = 6 * np.cos(u) * (1 + np.sin(u)) + r * np.cos(v + np.pi)
-    y = 16 * np.sin(u)
-    z = 6 * np.cos(u) * (1 + np.sin(u)) + r * np.sin(v)
-    
-    return x, y, z, "Klein Bottle"
 
-def create_torus(u_res, v_res, R=2, r=0.5):
-    u = np.linspace(0, 2 * np.pi, u_res)
-    v = np.linspace(0, 2 * np.pi, v_res)
-    u, v = np.meshgrid(u, v)
-    
-    x = (R + r * np.cos(v)) * np.cos(u)
-    y = (R + r * np.cos(v)) * np.sin(u)
-    z = r * np.sin(v)
-    
-    return x, y, z, "Torus"
+# Color limits of the z coloring, so plotly.js does not have to scan for them
+def color_limits(mesh):
+    if not np.isfinite(mesh.extent[2]):
+        return {}
+    return dict(cmin=float(mesh.low[2]), cmax=float(mesh.high[2]))
 
-def create_sphere(u_res, v_res, r=1):
-    u = np.linspace(0, 2 * np.pi, u_res)
-    v = np.linspace(0, np.pi, v_res)
-    u, v = np.meshgrid(u, v)
-    
-    x = r * np.sin(v) * np.cos(u)
-    y = r * np.sin(v) * np.sin(u)
-    z = r * np.cos(v)
-    
-    return x, y, z, "Sphere"
 
-def create_custom_function(u_res, v_res, x_expr, y_expr, z_expr, u_min, u_max, v_min, v_max):
-    # Parse expressions
-    try:
-        u_sym, v_sym = sp.symbols('u v')
-        
-        x_func = lambdify((u_sym, v_sym), parse_expr(x_expr), 'numpy')
-        y_func = lambdify((u_sym, v_sym), parse_expr(y_expr), 'numpy')
-        z_func = lambdify((u_sym, v_sym), parse_expr(z_expr), 'numpy')
-        
-        u = np.linspace(u_min, u_max, u_res)
-        v = np.linspace(v_min, v_max, v_res)
-        u, v = np.meshgrid(u, v)
-        
-        x = x_func(u, v)
-        y = y_func(u, v)
-        z = z_func(u, v)
-        
-        return x, y, z, "Custom Parametric Surface"
-    except Exception as e:
-        st.error(f"Error evaluating expressions: {str(e)}")
-        return None, None, None, None
-
-def create_custom_explicit(u_res, v_res, z_expr, x_min, x_max, y_min, y_max):
-    try:
-        x_sym, y_sym = sp.symbols('x y')
-        
-        z_func = lambdify((x_sym, y_sym), parse_expr(z_expr), 'numpy')
-        
-        x = np.linspace(x_min, x_max, u_res)
-        y = np.linspace(y_min, y_max, v_res)
-        x, y = np.meshgrid(x, y)
-        
-        z = z_func(x, y)
-        
-        return x, y, z, "Custom Explicit Surface z=f(x,y)"
-    except Exception as e:
-        st.error(f"Error evaluating expression: {str(e)}")
-        return None, None, None, None
-
-# Create color maps
-def get_color_maps():
-    # Standard colormaps
-    standard_maps = ['viridis', 'plasma', 'inferno', 'magma', 'cividis',
-                    'Spectral', 'coolwarm', 'rainbow', 'jet']
-    
-    # Create custom colormaps
-    custom_maps = {}
-    
-    # Ocean theme
-    ocean_colors = [(0, '#03045e'), (0.25, '#0077b6'), 
-                    (0.5, '#00b4d8'), (0.75, '#90e0ef'), (1, '#caf0f8')]
-    custom_maps['ocean'] = LinearSegmentedColormap.from_list('ocean', ocean_colors)
-    
-    # Sunset theme
-    sunset_colors = [(0, '#4a0a77'), (0.25, '#b5179e'), 
-                    (0.5, '#f72585'), (0.75, '#fb8500'), (1, '#ffcf55')]
-    custom_maps['sunset'] = LinearSegmentedColormap.from_list('sunset', sunset_colors)
-    
-    # Forest theme
-    forest_colors = [(0, '#081c15'), (0.25, '#1b4332'), 
-                    (0.5, '#2d6a4f'), (0.75, '#52b788'), (1, '#d8f3dc')]
-    custom_maps['forest'] = LinearSegmentedColormap.from_list('forest', forest_colors)
-    
-    # Galaxy theme
-    galaxy_colors = [(0, '#0d1b2a'), (0.25, '#1b263b'), 
-                    (0.5, '#415a77'), (0.75, '#778da9'), (1, '#e0e1dd')]
-    custom_maps['galaxy'] = LinearSegmentedColormap.from_list('galaxy', galaxy_colors)
-    
-    # Fire theme
-    fire_colors = [(0, '#370617'), (0.25, '#9d0208'), 
-                (0.5, '#dc2f02'), (0.75, '#f48c06'), (1, '#ffba08')]
-    custom_maps['fire'] = LinearSegmentedColormap.from_list('fire', fire_colors)
+# Build the geometry part of the Plotly figure for an evaluated surface, as a
+# plotly JSON dict with the default style; trace arrays are sent as binary
+# float32/int32 typed arrays rather than decimal JSON. The result is cached
+# per surface and rendering style, so it must never be modified in place.
+# `lines` replaces the mesh edges as the wireframe of a triangulated surface.
+def build_base_figure(mesh, plot_style, lines=None):
+    x, y, z, triangles = mesh.x, mesh.y, mesh.z, mesh.triangles
+    fig = go.Figure()
+
+    # Add surface based on style
+    if triangles is not None:
+        # Adaptive meshes are drawn as triangles; their edges form the wireframe
+        if plot_style == "Surface" or plot_style == "Surface + Wireframe":
+            fig.add_trace(
+                go.Mesh3d(
+                    x=typed_array(x), y=typed_array(y), z=typed_array(z),
+                    i=typed_array(triangles[:, 0]), j=typed_array(triangles[:, 1]), k=typed_array(triangles[:, 2]),
+                    intensity=typed_array(z), **color_limits(mesh)
+                )
+            )
+        if plot_style == "Wireframe" or plot_style == "Surface + Wireframe":
+            edge_x, edge_y, edge_z = lines if lines is not None else mesh_edge_lines(x, y, z, triangles)
+            fig.add_trace(
+                go.Scatter3d(
+                    x=typed_array(edge_x), y=typed_array(edge_y), z=typed_array(edge_z),
+                    mode='lines',
+                    line=dict(color='black', width=1.5 if plot_style == "Wireframe" else 1),
+                    showlegend=False
+                )
+            )
+    elif plot_style == "Surface" or plot_style == "Surface + Wireframe":
+        fig.add_trace(
+            go.Surface(
+                x=typed_array(x), y=typed_array(y), z=typed_array(z),
+                contours={
+                    "x": {"show": plot_style == "Surface + Wireframe", "width": 1, "color": "black"},
+                    "y": {"show": plot_style == "Surface + Wireframe", "width": 1, "color": "black"},
+                    "z": {"show": plot_style == "Surface + Wireframe", "width": 1, "color": "black"}
+                },
+                **color_limits(mesh)
+            )
+        )
+
+    if plot_style == "Wireframe" and triangles is None:
+        # All grid rows and columns as one NaN-separated line trace
+        line_x, line_y, line_z = grid_lines(x, y, z)
+        fig.add_trace(
+            go.Scatter3d(
+                x=typed_array(line_x), y=typed_array(line_y), z=typed_array(line_z),
+                mode='lines',
+                line=dict(color='black', width=1.5),
+                showlegend=False
+            )
+        )
+
+    # Set layout for the figure
+    camera = dict(
+        eye=dict(x=1.5, y=1.5, z=1.5)
+    )
+
+    x_range, y_range, z_range = axis_ranges(mesh)
+
+    # Set layout with improved styling
+    fig.update_layout(
+        title={
+            'text': f"<b>{mesh.title}</b>",
+            'y':0.95,
+            'x':0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': dict(size=24, color='#1e3c72')
+        },
+        scene=dict(
+            xaxis=dict(
+                title="X-axis",
+                range=x_range
+            ),
+            yaxis=dict(
+                title="Y-axis",
+                range=y_range
+            ),
+            zaxis=dict(
+                title="Z-axis",
+                range=z_range
+            ),
+            aspectmode='cube',
+            camera=camera
+        ),
+        width=900,
+        height=750,
+        margin=dict(l=0, r=0, b=0, t=40),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font=dict(family="Arial, sans-serif")
+    )
     
-    return standard_maps, custom_maps
-
-# Convert matplotlib colormap to plotly colorscale
-def convert_colormap_to_colorscale(colormap_name, custom_maps):
-    if colormap_name in custom_maps:
-        cmap = custom_maps[colormap_name]
-        # Sample the colormap at 11 points
-        colors = cmap(np.linspace(0, 1, 11))
-        return [(i/10, f'rgb({int(r*255)},{int(g*255)},{int(b*255)})') 
-                for i, (r, g, b, _) in enumerate(colors)]
+    return fig.to_plotly_json()
+
+
+# Apply the style options to a base figure. Only the small style fields are
+# copied; the trace arrays are shared with the cached base figure.
+def apply_style(base, colorscale, alpha, show_grid, show_axes, show_colorbar):
+    data = []
+    for trace in base['data']:
+        trace = dict(trace, opacity=alpha)
+        if trace['type'] in ('surface', 'mesh3d'):
+            trace.update(colorscale=colorscale, showscale=show_colorbar)
+        data.append(trace)
+
+    scene = dict(base['layout']['scene'])
+    for axis in ('xaxis', 'yaxis', 'zaxis'):
+        scene[axis] = dict(scene[axis], visible=show_axes, showgrid=show_grid)
+    return dict(base, data=data, layout=dict(base['layout'], scene=scene))
+
+
+# Build the base figure of an animation from a (3, T, V, U) mesh: the first
+# frame is drawn, and the frames replace only the coordinates that change, as
+# typed arrays, with playback in the browser
+def build_animated_figure(mesh, plot_style, labels, prefix):
+    fig = build_base_figure(SurfaceMesh(mesh.points[:, 0], mesh.title), plot_style)
+    x, y, z = mesh.x, mesh.y, mesh.z
+    if plot_style == "Wireframe":
+        lines = [grid_lines(*frame) for frame in zip(x, y, z)]
+        arrays = {name: np.stack([frame[n] for frame in lines]) for n, name in enumerate('xyz')}
     else:
-        # For standard colormaps, use the name directly in plotly
-        return colormap_name
+        arrays = {'x': x, 'y': y, 'z': z}
+
+    # The axes and the colors fit every frame, not just the first
+    scene = dict(fig['layout']['scene'])
+    for axis, axis_range in zip(('xaxis', 'yaxis', 'zaxis'), axis_ranges(mesh)):
+        scene[axis] = dict(scene[axis], range=axis_range)
+    layout = dict(fig['layout'], scene=scene,
+                  updatemenus=[play_buttons(1000 / SURFACE_FRAME_RATE)], sliders=[frame_slider(labels, prefix)])
+    data = [dict(trace, **color_limits(mesh)) if trace['type'] == 'surface' else trace for trace in fig['data']]
+    return dict(fig, data=data, frames=data_frames(fig['data'][0]['type'], arrays), layout=layout)
+
+
+# Turn the camera in the browser: Play runs camera-only frames in plotly.js,
+# with no reruns and without sending the geometry again
+def add_auto_rotation(fig, rotation_speed):
+    frames, duration = orbit_frames(fig['layout']['scene']['camera']['eye'], rotation_speed)
+    return dict(fig, frames=frames, layout=dict(fig['layout'], updatemenus=[play_buttons(duration)]))
+
+
+# The full-resolution arrays of an evaluated surface as an .npz file, whatever
+# mesh is drawn
+def surface_npz(mesh):
+    arrays = dict(x=mesh.x, y=mesh.y, z=mesh.z)
+    if mesh.triangles is not None:
+        arrays['triangles'] = mesh.triangles
+    buffer = BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+# Build the interactive Plotly figure for an evaluated surface
+def build_figure(mesh, colorscale, plot_style, alpha, show_grid, show_axes, show_colorbar):
+    return apply_style(build_base_figure(mesh, plot_style),
+                       colorscale, alpha, show_grid, show_axes, show_colorbar)
 
 
 # Sidebar for controls
@@ -289,69 +341,24 @@ with st.sidebar:
     
     graph_type = st.selectbox(
         "Select Graph Type", 
-        ["Möbius Strip", "Klein Bottle", "Torus", "Sphere", 
-        "Custom Parametric Surface", "Custom Explicit Surface z=f(x,y)"],
-        index=["Möbius Strip", "Klein Bottle", "Torus", "Sphere", 
-            "Custom Parametric Surface", "Custom Explicit Surface z=f(x,y)"].index(default_graph),
+        list(SURFACES),
+        index=list(SURFACES).index(default_graph),
         key="explorer_graph_type",
         on_change=on_graph_type_change
     )
-    # Parameters specific to each graph type
-    if graph_type == "Torus":
-        col1, col2 = st.columns(2)
-        with col1:
-            torus_R = st.slider("Major Radius (R)", 0.5, 5.0, 2.0, 0.1, 
-                            key="explorer_torus_R", on_change=on_param_change)
-        with col2:
-            torus_r = st.slider("Minor Radius (r)", 0.1, 3.0, 0.5, 0.1, key="explorer_torus_r", on_change=on_param_change)
-            
-    elif graph_type == "Sphere":
-        sphere_r = st.slider("Radius", 0.1, 5.0, 1.0, 0.1, 
-                            key="explorer_sphere_r", on_change=on_param_change)
-        
-    elif graph_type == "Custom Parametric Surface":
-        with st.form(key="parametric_form"):
-            st.markdown("### Define Parametric Equations")
-            st.markdown("<div class='info-box'>Use `u` and `v` as parameters</div>", unsafe_allow_html=True)
-            
-            x_expr = st.text_input("x(u,v) = ", "(1 + 0.5*cos(v))*cos(u)", key="explorer_x_expr")
-            y_expr = st.text_input("y(u,v) = ", "(1 + 0.5*cos(v))*sin(u)", key="explorer_y_expr")
-            z_expr = st.text_input("z(u,v) = ", "0.5*sin(v)", key="explorer_z_expr")
-
-            col1, col2 = st.columns(2)
-            with col1:
-                u_min = st.number_input("u min", value=0.0, key="explorer_u_min")
-                v_min = st.number_input("v min", value=0.0, key="explorer_v_min")
-            with col2:
-                u_max = st.number_input("u max", value=2*np.pi, key="explorer_u_max")
-                v_max = st.number_input("v max", value=2*np.pi, key="explorer_v_max")
-            
-            submit_button = st.form_submit_button(label="Update Graph", on_click=on_equation_submit)
-    
-    elif graph_type == "Custom Explicit Surface z=f(x,y)":
-        with st.form(key="explicit_form"):
-            st.markdown("### Define Function")
-            st.markdown("<div class='info-box'>Use `x` and `y` as variables</div>", unsafe_allow_html=True)
-            
-            z_expr_explicit = st.text_input("z(x,y) = ", "sin(sqrt(x**2 + y**2))", key="explorer_z_expr_explicit")
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                x_min = st.number_input("x min", value=-5.0, key="explorer_x_min")
-                y_min = st.number_input("y min", value=-5.0, key="explorer_y_min")
-            with col2:
-                x_max = st.number_input("x max", value=5.0, key="explorer_x_max")
-                y_max = st.number_input("y max", value=5.0, key="explorer_y_max")
-            
-            submit_button = st.form_submit_button(label="Update Graph", on_click=on_equation_submit)
+    surface = SURFACES[graph_type]
+    # Parameters specific to each graph type, drawn from its registry entry;
+    # custom equations are applied together from a form
+    surface_params = surface_controls(surface, "explorer", on_change=on_param_change, form="equation_form",
+                                      on_submit=on_equation_submit,
+                                      hint_suffix=", and `t` for time when animating")
 
     
     # Create an expander for all visualization options
+    display_target = None  # Triangle count to decimate the drawn mesh to
     with st.expander("Visualization Options"):
         # Color settings     
-        standard_maps, custom_maps = get_color_maps()     
-        all_colormaps = standard_maps + list(custom_maps.keys())     
-        colormap = st.selectbox("Color Map", all_colormaps, index=0, 
+        colormap = st.selectbox("Color Map", colormap_names(), index=0, 
                             key="explorer_colormap", on_change=on_param_change)         
         
         # Plot settings     
@@ -359,6 +366,57 @@ with st.sidebar:
                             key="explorer_plot_style", on_change=on_param_change)   
         alpha = st.slider("Transparency", 0.0, 1.0, 0.8, 0.05, 
                         key="explorer_alpha", on_change=on_param_change)         
+        # float32 halves memory and plot payload; plenty for a display mesh
+        precision = st.selectbox("Precision", ["float64", "float32"], index=0,
+                            key="explorer_precision", on_change=on_param_change)
+        # Adaptive sampling refines only where the surface bends
+        sampling = st.radio("Sampling", ["Uniform grid", "Adaptive mesh"],
+                            key="explorer_sampling", on_change=on_param_change)
+        if sampling == "Adaptive mesh":
+            mesh_tolerance = st.select_slider("Chord Error Tolerance", [0.0005, 0.001, 0.002, 0.005, 0.01, 0.02],
+                                value=0.002, key="explorer_mesh_tolerance", on_change=on_param_change)
+            mesh_max_vertices = st.slider("Vertex Budget", 1000, 50000, 10000, 1000,
+                                key="explorer_mesh_max_vertices", on_change=on_param_change)
+        else:
+            # Weld seam and pole samples into a shared-vertex triangle mesh
+            indexed_mesh = st.checkbox("Indexed Mesh", value=False,
+                                key="explorer_indexed_mesh", on_change=on_param_change)
+            # Draw a simplified mesh; the full-resolution surface stays available for export
+            decimate = st.checkbox("Decimate for Display", value=False,
+                                key="explorer_decimate", on_change=on_param_change)
+            if decimate:
+                display_target = st.slider("Display Triangles", 5000, 200000, display_triangles, 5000,
+                                key="explorer_display_triangles", on_change=on_param_change)
+        # Evaluate every frame of a parameter sweep at once and play them in the browser
+        animate = st.checkbox("Animate", value=False, disabled=sampling != "Uniform grid",
+                            key="explorer_animate", on_change=on_param_change)
+        sweep = None
+        if animate and sampling == "Uniform grid":
+            animation_frames = st.slider("Animation Frames", 2, MAX_FRAMES, 24,
+                                key="explorer_animation_frames", on_change=on_param_change)
+            if surface.sweep is not None:
+                sweep = st.slider(surface.sweep.label, surface.sweep.low, surface.sweep.high, surface.sweep.default,
+                                surface.sweep.step, key=f"explorer_{surface.sweep.widget}", on_change=on_param_change)
+            else:
+                st.caption("Animation is available for the torus, the sphere and custom surfaces.")
+        animating = sweep is not None
+        # Show a coarse preview first, then refine it in place
+        progressive = st.checkbox("Progressive Rendering", value=False,
+                            key="explorer_progressive")
+        # Custom surfaces: evaluate components and row chunks on a thread pool
+        threaded = st.checkbox("Multi-threaded Evaluation", value=THREADED,
+                            key="explorer_threaded")
+        # Custom surfaces: a compiled loop per grid point instead of whole-array operations
+        backend = st.selectbox("Expression Backend", ["numpy", "numba"], index=["numpy", "numba"].index(BACKEND),
+                            key="explorer_backend")
+        if backend == "numba" and not jit_available():
+            st.caption("Numba is not installed; using NumPy.")
+        # Size the grid from measured costs so each update fits the budget
+        auto_resolution = st.checkbox("Automatic Resolution", value=False,
+                            key="explorer_auto_resolution", on_change=on_param_change)
+        if auto_resolution:
+            latency_budget = st.slider("Latency Budget (ms)", 100, 3000, int(latency_budget_ms), 100,
+                                key="explorer_latency_budget", on_change=on_param_change)
         
         # Additional options     
         show_grid = st.checkbox("Show Grid", value=True, 
@@ -388,33 +446,60 @@ current_params = {
     'alpha': alpha,
     'show_grid': show_grid,
     'show_axes': show_axes,
-    'show_colorbar': show_colorbar
+    'show_colorbar': show_colorbar,
+    'precision': precision
 }
 
-# Add specific parameters based on graph type
-if graph_type == "Torus":
-    current_params['torus_R'] = torus_R
-    current_params['torus_r'] = torus_r
-elif graph_type == "Sphere":
-    current_params['sphere_r'] = sphere_r
-elif graph_type == "Custom Parametric Surface":
-    current_params.update({
-        'x_expr': x_expr,
-        'y_expr': y_expr,
-        'z_expr': z_expr,
-        'u_min': u_min,
-        'u_max': u_max,
-        'v_min': v_min,
-        'v_max': v_max
-    })
-elif graph_type == "Custom Explicit Surface z=f(x,y)":
+if sampling == "Adaptive mesh":
     current_params.update({
-        'z_expr': z_expr_explicit,  # Changed from z_expr to z_expr_explicit
-        'x_min': x_min,
-        'x_max': x_max,
-        'y_min': y_min,
-        'y_max': y_max
+        'sampling': sampling,
+        'mesh_tolerance': mesh_tolerance,
+        'mesh_max_vertices': mesh_max_vertices
     })
+elif indexed_mesh:
+    current_params['indexed_mesh'] = True
+
+# Add the parameters of the selected graph type
+current_params.update(surface_params)
+
+# Pick the largest grid predicted to fit the latency budget. The choice is
+# kept in its own key, so the user's resolution is untouched, and revisited
+# only once the surface has been timed again, never on a style-only change
+# whose cached geometry can be reused at the current resolution
+u_res, v_res = st.session_state.u_res, st.session_state.v_res
+predicted_seconds = None
+if auto_resolution and sampling == "Uniform grid" and not animating:
+    key = cost_key(current_params)
+    evaluation_fixed, evaluation_rate = evaluation_costs.estimate(key)
+    render_fixed, render_rate = render_costs.estimate(plot_style)
+    fixed_seconds, seconds_per_sample = evaluation_fixed + render_fixed, evaluation_rate + render_rate
+    geometry = geometry_key(current_params)
+    style = {name: current_params.get(name) for name in STYLE_PARAMS}
+    timings = evaluation_costs.observations(key)
+    choice = st.session_state.get('auto_resolution')
+    style_only = choice is not None and choice['geometry'] == geometry and choice['style'] != style
+    if (choice is None or choice['key'] != key or choice['budget'] != latency_budget
+            or (choice['timings'] != timings and not style_only)):
+        resolution = choose_resolution(fixed_seconds, seconds_per_sample, latency_budget / 1000,
+                                       choice['resolution'] if choice else (u_res, v_res))
+        choice = {'resolution': resolution, 'key': key, 'budget': latency_budget, 'timings': timings}
+    # The previous run's parameters, to recognize style-only changes
+    choice.update(geometry=geometry, style=style)
+    st.session_state.auto_resolution = choice
+    u_res, v_res = choice['resolution']
+    current_params.update(u_res=u_res, v_res=v_res)
+    predicted_seconds = fixed_seconds + seconds_per_sample * u_res * v_res
+elif not auto_resolution:
+    st.session_state.pop('auto_resolution', None)
+
+# Fit the number of animation frames to the budget at this resolution
+if animating:
+    frame_count = frame_budget(animation_frames, u_res * v_res)
+    if frame_count < 2:
+        st.warning("The grid is too large to animate within the budget; lower the resolution.")
+        animating = False
+    else:
+        current_params.update(animation_frames=frame_count, sweep=sweep)
 
 # Check if we should update the graph
 # Check if we should update the graph (now always updates on any parameter change)
@@ -423,252 +508,158 @@ should_update = True
 if should_update:
     st.session_state.last_graph_params = current_params
     
-    # Generate the surface data based on graph type
-    if graph_type == "Möbius Strip":
-        x, y, z, title = create_mobius_strip(st.session_state.u_res, st.session_state.v_res)
-    elif graph_type == "Klein Bottle":
-        x, y, z, title = create_klein_bottle(st.session_state.u_res, st.session_state.v_res)
-    elif graph_type == "Torus":
-        x, y, z, title = create_torus(st.session_state.u_res, st.session_state.v_res, torus_R, torus_r)
-    elif graph_type == "Sphere":
-        x, y, z, title = create_sphere(st.session_state.u_res, st.session_state.v_res, sphere_r)
-    elif graph_type == "Custom Parametric Surface":
-        x, y, z, title = create_custom_function(st.session_state.u_res, st.session_state.v_res, x_expr, y_expr, z_expr, u_min, u_max, v_min, v_max)
-    elif graph_type == "Custom Explicit Surface z=f(x,y)":
-        x, y, z, title = create_custom_explicit(st.session_state.u_res, st.session_state.v_res, z_expr_explicit, x_min, x_max, y_min, y_max)
-
-    if x is not None:
+    # Reuse the evaluated surface when only style parameters changed
+    dtype = np.dtype(precision)
+    cache_key = geometry_key(current_params)
+    cached_surface = geometry_cache.get(cache_key)
+    chart_slot = None  # Created early when previews are drawn during evaluation
+    
+    # Plotly colorscale sampled from the shared colormap table
+    colorscale = plotly_colorscale(colormap)
+    evaluation_start = time.perf_counter()
+
+    if cached_surface is not None:
+        mesh = cached_surface
+    elif animating:
+        try:
+            mesh = evaluate_animation(graph_type, u_res, v_res, frame_count,
+                                      sweep, surface_params, dtype, backend)
+        except Exception as e:
+            st.error(f"Error evaluating expressions: {str(e)}")
+            mesh = None
+    elif progressive and sampling == "Uniform grid":
         st.markdown("<div class='graph-container'>", unsafe_allow_html=True)
-        
-        # Convert matplotlib colormap to plotly colorscale
-        colorscale = convert_colormap_to_colorscale(colormap, custom_maps)
-        
-        # Create interactive Plotly figure
-        fig = go.Figure()
-        
-        # Add surface based on style
-        if plot_style == "Surface" or plot_style == "Surface + Wireframe":
-            surface_opacity = alpha
-            showscale = show_colorbar
-            
-            fig.add_trace(
-                go.Surface(
-                    x=x, y=y, z=z,
-                    colorscale=colorscale,
-                    opacity=surface_opacity,
-                    showscale=showscale,
-                    contours={
-                        "x": {"show": plot_style == "Surface + Wireframe", "width": 1, "color": "black"},
-                        "y": {"show": plot_style == "Surface + Wireframe", "width": 1, "color": "black"},
-                        "z": {"show": plot_style == "Surface + Wireframe", "width": 1, "color": "black"}
-                    }
-                )
-            )
-        
-        if plot_style == "Wireframe":
-            # For wireframe only, need to use mesh3d or add multiple line traces
-            for i in range(x.shape[0]):
-                fig.add_trace(
-                    go.Scatter3d(
-                        x=x[i,:], y=y[i,:], z=z[i,:],
-                        mode='lines',
-                        line=dict(color='black', width=1.5),
-                        opacity=alpha,
-                        showlegend=False
-                    )
-                )
+        st.info(INTERACTIVE_CONTROLS_HINT)
+        chart_slot = st.empty()
+        try:
+            points, u_range, v_range = surface_points(graph_type, surface_params, dtype, backend)
+            u = np.linspace(*u_range, u_res, dtype=dtype)
+            v = np.linspace(*v_range, v_res, dtype=dtype)
+            # Each level reuses the samples of the coarser ones; the last is the full grid
+            for level in progressive_levels(points, u, v, levels=PROGRESSIVE_LEVELS, dtype=dtype):
+                mesh = SurfaceMesh(level, graph_type)
+                if level.shape[1:] != (len(v), len(u)):
+                    chart_slot.plotly_chart(build_figure(mesh, colorscale, plot_style, alpha,
+                                                         show_grid, show_axes, show_colorbar),
+                                            use_container_width=True)
+        except Exception as e:
+            st.error(f"Error evaluating expressions: {str(e)}")
+            mesh = None
+    elif sampling == "Adaptive mesh":
+        try:
+            points, u_range, v_range = surface_points(graph_type, surface_params, dtype, backend)
+            x, y, z, triangles = adaptive_mesh(points, u_range, v_range,
+                                               tolerance=mesh_tolerance,
+                                               max_vertices=mesh_max_vertices, dtype=dtype)
+            mesh = SurfaceMesh.from_components(x, y, z, graph_type, triangles)
+        except Exception as e:
+            st.error(f"Error evaluating expressions: {str(e)}")
+            mesh = None
+    # Generate the surface data based on graph type
+    else:
+        try:
+            mesh = evaluate_surface(graph_type, u_res, v_res, surface_params,
+                                    dtype=dtype, threaded=threaded, backend=backend)
+        except Exception as e:
+            st.error(f"Error evaluating expressions: {str(e)}")
+            mesh = None
+
+    if cached_surface is None and mesh is not None and sampling == "Uniform grid" and indexed_mesh and not animating:
+        x, y, z, triangles = weld_grid(mesh.x, mesh.y, mesh.z)
+        mesh = SurfaceMesh.from_components(x, y, z, mesh.title, triangles)
+    evaluation_seconds = time.perf_counter() - evaluation_start
+
+    # Failed evaluations are not cached so a corrected expression is retried
+    if cached_surface is None and mesh is not None:
+        mesh.key = cache_key
+        geometry_cache.put(cache_key, mesh)
+    
+    # Uniform-grid timings feed the cost model behind automatic resolution
+    samples = u_res * v_res
+    timed = sampling == "Uniform grid" and mesh is not None and not animating
+    if timed and cached_surface is None and not progressive:
+        evaluation_costs.observe(cost_key(current_params), samples, evaluation_seconds)
+
+    if mesh is not None:
+        if chart_slot is None:
+            st.markdown("<div class='graph-container'>", unsafe_allow_html=True)
             
-            for j in range(x.shape[1]):
-                fig.add_trace(
-                    go.Scatter3d(
-                        x=x[:,j], y=y[:,j], z=z[:,j],
-                        mode='lines',
-                        line=dict(color='black', width=1.5),
-                        opacity=alpha,
-                        showlegend=False
-                    )
-                )
-        
-        # Set layout for the figure
-        camera = dict(
-            eye=dict(x=1.5, y=1.5, z=1.5)
-        )
-        
-        # Calculate ranges for axes
-        max_range = np.array([
-            x.max() - x.min(),
-            y.max() - y.min(),
-            z.max() - z.min()
-        ]).max() / 2.0
+            # Add an informational note about interactivity
+            st.info(INTERACTIVE_CONTROLS_HINT)
+            chart_slot = st.empty()
         
-        mid_x = (x.max() + x.min()) / 2
-        mid_y = (y.max() + y.min()) / 2
-        mid_z = (z.max() + z.min()) / 2
-        
-        # Set layout with improved styling
-        fig.update_layout(
-            title={
-                'text': f"<b>{title}</b>",
-                'y':0.95,
-                'x':0.5,
-                'xanchor': 'center',
-                'yanchor': 'top',
-                'font': dict(size=24, color='#1e3c72')
-            },
-            scene=dict(
-                xaxis=dict(
-                    title="X-axis",
-                    visible=show_axes,
-                    showgrid=show_grid,
-                    range=[mid_x - max_range, mid_x + max_range]
-                ),
-                yaxis=dict(
-                    title="Y-axis",
-                    visible=show_axes,
-                    showgrid=show_grid,
-                    range=[mid_y - max_range, mid_y + max_range]
-                ),
-                zaxis=dict(
-                    title="Z-axis",
-                    visible=show_axes,
-                    showgrid=show_grid,
-                    range=[mid_z - max_range, mid_z + max_range]
-                ),
-                aspectmode='cube',
-                camera=camera
-            ),
-            width=900,
-            height=750,
-            margin=dict(l=0, r=0, b=0, t=40),
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(family="Arial, sans-serif")
-        )
-        
-        # Add an informational note about interactivity
-        st.info("**Interactive Controls**: Click and drag to rotate, scroll to zoom, shift+click to pan.")
+        render_start = time.perf_counter()
+        # Large surfaces are drawn from a simplified mesh; the evaluated mesh
+        # stays at full resolution. Grid wireframes already thin out their lines.
+        display_mesh = None
+        triangles = mesh.triangles
+        if display_target is not None and not animating and (triangles is not None or plot_style != "Wireframe"):
+            full_triangles = len(triangles) if triangles is not None else 2 * (mesh.x.shape[0] - 1) * (mesh.x.shape[1] - 1)
+            if full_triangles > display_target:
+                display_key = (cache_key, display_target)
+                display_mesh = geometry_cache.get(display_key)
+                if display_mesh is None:
+                    x, y, z, simplified = simplify_mesh(mesh.x, mesh.y, mesh.z, triangles, display_target)
+                    display_mesh = SurfaceMesh.from_components(x, y, z, mesh.title, simplified)
+                    geometry_cache.put(display_key, display_mesh)
+        # Style-only changes reuse the base figure and just restyle it
+        figure_key = (cache_key, plot_style, display_target if display_mesh is not None else None)
+        base_figure = figure_cache.get(figure_key)
+        restyled = base_figure is not None
+        if not restyled and animating:
+            labels = [f"{value:.2f}" for value in np.linspace(*sweep, frame_count)]
+            base_figure = build_animated_figure(mesh, plot_style, labels, surface.sweep.prefix)
+            figure_cache.put(figure_key, base_figure)
+        elif not restyled and display_mesh is not None:
+            lines = grid_lines(mesh.x, mesh.y, mesh.z) if triangles is None and plot_style != "Surface" else None
+            base_figure = build_base_figure(display_mesh, plot_style, lines)
+            figure_cache.put(figure_key, base_figure)
+        elif not restyled:
+            base_figure = build_base_figure(mesh, plot_style)
+            figure_cache.put(figure_key, base_figure)
+        fig = apply_style(base_figure, colorscale, alpha, show_grid, show_axes, show_colorbar)
+        if auto_rotate and not animating:
+            fig = add_auto_rotation(fig, rotation_speed)
         
         # Display the interactive 3D plot
-        st.plotly_chart(fig, use_container_width=True)
+        chart_slot.plotly_chart(fig, use_container_width=True)
+        render_seconds = time.perf_counter() - render_start
+        # Restyling a cached figure, or drawing a simplified one, says nothing
+        # about the cost of building the full-resolution figure
+        if timed and not restyled and display_mesh is None:
+            render_costs.observe(plot_style, samples, render_seconds)
+        if animating:
+            limited = " (limited by the animation budget)" if frame_count < animation_frames else ""
+            st.caption(f"Animation: {frame_count} frames of {u_res}×{v_res}"
+                       f"{limited}. Press Play on the chart; playback runs in the browser.")
+        elif auto_rotate:
+            st.caption("Auto-rotate: press Play on the chart. Rotation runs in the browser.")
+        if triangles is not None:
+            mesh_kind = "Adaptive mesh" if sampling == "Adaptive mesh" else "Indexed mesh"
+            st.caption(f"{mesh_kind}: {mesh.points.shape[1]:,} vertices, {len(triangles):,} triangles")
+        if display_mesh is not None:
+            st.caption(f"Display mesh: {len(display_mesh.triangles):,} of {full_triangles:,} triangles "
+                       f"({display_mesh.points.shape[1]:,} vertices)")
+            st.download_button("Download Full Resolution (.npz)", data=lambda: surface_npz(mesh),
+                               file_name="surface.npz", mime="application/octet-stream",
+                               on_click="ignore", key="explorer_download_full")
+        # Timing of the uniform-grid evaluation paths that the thread pool applies to
+        if cached_surface is None and sampling == "Uniform grid" and not progressive and not animating and graph_type.startswith("Custom"):
+            mode = ("threaded" if threaded else "single-threaded") + (", isolated worker" if ISOLATED else "")
+            mode += ", numba" if backend == "numba" and jit_available() else ", numpy"
+            st.caption(f"Evaluated in {evaluation_seconds * 1000:.1f} ms ({mode})")
+        if predicted_seconds is not None:
+            evaluation = "cached" if cached_surface is not None else f"{evaluation_seconds * 1000:.0f} ms"
+            st.caption(f"Automatic resolution {u_res}×{v_res}: "
+                       f"predicted {predicted_seconds * 1000:.0f} ms, "
+                       f"actual {(evaluation_seconds + render_seconds) * 1000:.0f} ms "
+                       f"(evaluation {evaluation}, rendering {render_seconds * 1000:.0f} ms)")
         
         st.markdown("</div>", unsafe_allow_html=True)
         
         # Add information about the current graph
         with st.expander("Graph Information"):
-            if graph_type == "Möbius Strip":
-                st.markdown("""
-                ### Möbius Strip
-                
-                **Mathematical Definition:**
-                A non-orientable surface with only one side and one boundary component.
-                
-                **Parametric Equations:**
-                ```
-                x = (1 + (v/2)cos(u/2))cos(u)
-                y = (1 + (v/2)cos(u/2))sin(u)
-                z = (v/2)sin(u/2)
-                ```
-                Where:
-                - u ∈ [0, 2π) (angular parameter)
-                - v ∈ [-1, 1] (width parameter)
-                
-                **Key Properties:**
-                - Single-sided surface
-                - Non-orientable
-                - Euler characteristic: χ = 0
-                - Requires 720° rotation to return to initial state
-                """)
-            elif graph_type == "Klein Bottle":
-                st.markdown("""
-                ### Klein Bottle
-                
-                **Mathematical Definition:**
-                A non-orientable surface with no boundary that cannot be embedded in three-dimensional space without intersecting itself.
-                
-                **Key Properties:**
-                - Non-orientable surface
-                - Has no inside or outside
-                - Cannot be properly embedded in 3D space
-                - Self-intersects in this 3D representation
-                - Euler characteristic: χ = 0
-                
-                The representation shown is a common visualization of the Klein bottle in 3D space, though a true Klein bottle requires 4D space to exist without self-intersection.
-                """)
-            elif graph_type == "Torus":
-                st.markdown(f"""
-                ### Torus
-                
-                **Mathematical Definition:**
-                A surface of revolution generated by revolving a circle around an axis coplanar with the circle.
-                
-                **Parametric Equations:**
-                ```
-                x = (R + r*cos(v))*cos(u)
-                y = (R + r*cos(v))*sin(u)
-                z = r*sin(v)
-                ```
-                Where:
-                - R = {torus_R} (major radius)
-                - r = {torus_r} (minor radius)
-                - u, v ∈ [0, 2π)
-                
-                **Key Properties:**
-                - Orientable surface
-                - Genus 1 (it has one "hole")
-                - Euler characteristic: χ = 0
-                """)
-            elif graph_type == "Sphere":
-                st.markdown(f"""
-                ### Sphere
-                
-                **Mathematical Definition:**
-                The set of all points in 3D space that are equidistant from a fixed point (the center).
-                
-                **Parametric Equations:**
-                ```
-                x = r*sin(v)*cos(u)
-                y = r*sin(v)*sin(u)
-                z = r*cos(v)
-                ```
-                Where:
-                - r = {sphere_r} (radius)
-                - u ∈ [0, 2π) (longitude)
-                - v ∈ [0, π] (latitude)
-                
-                **Key Properties:**
-                - Orientable surface
-                - Surface area = 4πr²
-                - Volume = (4/3)πr³
-                - Euler characteristic: χ = 2
-                """)
-            elif graph_type == "Custom Parametric Surface":
-                st.markdown(f"""
-                ### Custom Parametric Surface
-                
-                **Equations:**
-                ```
-                x(u,v) = {x_expr}
-                y(u,v) = {y_expr}
-                z(u,v) = {z_expr}
-                ```
-                
-                **Parameter Ranges:**
-                - u ∈ [{u_min}, {u_max}]
-                - v ∈ [{v_min}, {v_max}]
-                """)
-            elif graph_type == "Custom Explicit Surface z=f(x,y)":
-                st.markdown(f"""
-                ### Custom Explicit Surface
-                
-                **Equation:**
-                ```
-                z(x,y) = {z_expr_explicit}
-                ```
-                
-                **Domain:**
-                - x ∈ [{x_min}, {x_max}]
-                - y ∈ [{y_min}, {y_max}]
-                """)
+            st.markdown(surface.describe(surface_params))
 
 # Add Usage Guide
 with st.expander("Usage Guide"):
@@ -714,4 +705,3 @@ with st.expander("Usage Guide"):
     - Try different color maps to highlight different features
     - Surface + Wireframe style often provides the best visual understanding
     """)
-